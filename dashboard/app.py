@@ -2,6 +2,7 @@
 import sys
 import os
 import base64
+import warnings
 import streamlit as st
 import pandas as pd
 import plotly.express as px
@@ -13,6 +14,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from src import forecasting, risk_scoring
 from src.recommendations.recommend import run_recommendation_pipeline
 from src.data_preprocessing import main as data_preprocessing_main
+from src.ingestion import read_inventory_csv
+from src.ranking import rank_money_at_risk
 from src.forecasting import main as forecast_main
 from src.risk_scoring import main as risk_main
 
@@ -131,13 +134,20 @@ uploaded_file = st.file_uploader("Upload your Inventory CSV file", type=["csv"])
 
 if uploaded_file:
     st.success("✅ File uploaded successfully!")
-    uploaded_df = pd.read_csv(uploaded_file)
+    # Parse the upload once (multi-threaded Arrow reader) and keep the raw bytes only as an archive copy
+    raw_bytes = uploaded_file.getvalue()
+    with warnings.catch_warnings(record=True) as parse_warnings:
+        warnings.simplefilter("always")
+        uploaded_df = read_inventory_csv(raw_bytes)
+    for w in parse_warnings:
+        st.warning(f"⚠️ {w.message}")
     os.makedirs("data/raw", exist_ok=True)
     uploaded_path = "data/raw/uploaded_inventory.csv"
-    uploaded_df.to_csv(uploaded_path, index=False)
+    with open(uploaded_path, "wb") as f:
+        f.write(raw_bytes)
 
     # Run pipeline silently
-    data_preprocessing_main(uploaded_path)
+    data_preprocessing_main(uploaded_df)
     forecast_main()
     risk_main()
     run_recommendation_pipeline()
@@ -174,7 +184,9 @@ if uploaded_file:
         # ---- 2️⃣ Recommendations ----
         elif st.session_state.active_section == "Recommendations" and rec_df is not None:
             st.subheader("🎯 AI-Based Product Recommendations")
-            st.dataframe(rec_df.head(10))
+            # Prioritized by money at risk (streamed, so large outputs stay cheap)
+            risk_report = rank_money_at_risk(rec_file, k=10)
+            st.dataframe(risk_report["overall"])
             st.download_button(
                 label="⬇️ Download Recommendations CSV",
                 data=rec_df.to_csv(index=False).encode('utf-8'),
@@ -182,9 +194,15 @@ if uploaded_file:
                 mime="text/csv"
             )
 
-            st.subheader("📦 Top 10 Products by Stock Quantity")
-            top_products = rec_df.groupby("Product_Name")["Stock_Quantity"].sum().nlargest(10).reset_index()
-            st.bar_chart(top_products.set_index("Product_Name"))
+            st.subheader("💰 Money at Risk by Category (Top 10 Items Each)")
+            if risk_report["Category"].empty:
+                st.info("No stock is currently at risk.")
+            else:
+                by_category = risk_report["Category"].groupby("Category", sort=False)["Money_At_Risk"].sum()
+                st.bar_chart(by_category)
+            for group_col in ["Category", "Warehouse_Location"]:
+                with st.expander(f"Top 10 items per {group_col.replace('_', ' ')}"):
+                    st.dataframe(risk_report[group_col])
 
         # ---- 3️⃣ Filtered Insights ----
         elif st.session_state.active_section == "Filtered Insights" and rec_df is not None:
@@ -30,10 +30,26 @@ def run_pipeline(uploaded_file_path):
     print("\n🎯 Step 5: Recommendation Engine")
     run_recommendation_pipeline()
 
+    print("\n💾 Step 6: Saving the processed store for delta uploads")
+    from src.delta_ingestion import seed_store
+    seed_store()
+
     print("\n✅ Pipeline completed successfully. Output: data/external/recommendations.csv")
 
+def run_delta(delta_file_path):
+    from src.delta_ingestion import ingest_delta, export_outputs
+
+    print("🔁 Delta ingestion: recomputing only the changed rows")
+    store = ingest_delta(delta_file_path)
+    export_outputs(store)
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("❌ Please provide the uploaded CSV path.")
+    elif sys.argv[1] == "--delta":
+        if len(sys.argv) < 3:
+            print("❌ Please provide the delta CSV path.")
+        else:
+            run_delta(sys.argv[2])
     else:
         run_pipeline(sys.argv[1])
@@ -4,15 +4,39 @@ import pandas as pd
 import numpy as np
 import os
 
-def main(uploaded_file_path):
-    PROCESSED_PATH = "data/processed/processed_data.csv"
+from src.ingestion import read_inventory_csv, DATE_FORMATS
 
-    df = pd.read_csv(uploaded_file_path)
+REQUIRED_DATE_COLUMNS = ["Date_Received", "Expiration_Date", "Last_Order_Date"]
+
+
+def robust_datetime_convert(series):
+    """
+    Parses each value with the first of DATE_FORMATS that fits it (ISO
+    timestamps as a last resort), the same order the Arrow reader uses.
+    A value's date never depends on the other rows parsed with it.
+    """
+    text = series.astype("string").str.strip()
+    parsed = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS + ["ISO8601"]:
+        todo = parsed.isna() & text.notna()
+        if not todo.any():
+            break
+        parsed[todo] = pd.to_datetime(text[todo], format=fmt, errors="coerce")
+    return parsed
 
-    # Debugging: Log column names and data at key steps
-    print("Columns in raw data:", df.columns.tolist())
-    print("Sample data:")
-    print(df.head())
+
+def clean_raw_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cleans raw inventory rows: strips currency formatting from Unit_Price
+    and converts the date columns robustly.
+
+    Args:
+        df (pd.DataFrame): Raw inventory rows (uploaded CSV or JSON records).
+
+    Returns:
+        pd.DataFrame: Cleaned copy of the input.
+    """
+    df = df.copy()
 
     if "Unit_Price" in df.columns:
         df["Unit_Price"] = (
@@ -22,23 +46,33 @@ def main(uploaded_file_path):
             .astype(float)
         )
 
-    def robust_datetime_convert(series):
-        series = series.astype(str).str.strip().str.replace(r"[/]", "-", regex=True)
-        return pd.to_datetime(series, errors="coerce")
-
     # Ensure required columns exist in the raw data
-    required_columns = ["Date_Received", "Expiration_Date", "Last_Order_Date"]
-    missing_columns = [col for col in required_columns if col not in df.columns]
+    missing_columns = [col for col in REQUIRED_DATE_COLUMNS if col not in df.columns]
     if missing_columns:
         raise ValueError(f"Missing required columns in raw data: {', '.join(missing_columns)}")
 
-    # Convert date columns robustly
-    for col in required_columns:
-        df[col] = robust_datetime_convert(df[col])
+    # Convert date columns robustly (already typed columns, e.g. from the
+    # Arrow reader, are kept as they are)
+    for col in REQUIRED_DATE_COLUMNS:
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = robust_datetime_convert(df[col])
 
-    df = df.drop_duplicates()
+    return df
+
+
+def add_derived_features(df: pd.DataFrame, today=None) -> pd.DataFrame:
+    """
+    Adds the date-relative and value features used by the models.
 
-    today = pd.to_datetime("today").normalize()
+    Args:
+        df (pd.DataFrame): Cleaned inventory rows (see clean_raw_data).
+        today (pd.Timestamp, optional): Reference date. Defaults to today.
+
+    Returns:
+        pd.DataFrame: The same frame with derived columns added.
+    """
+    if today is None:
+        today = pd.to_datetime("today").normalize()
 
     if "Expiration_Date" in df.columns:
         df["Days_Until_Expiry"] = (df["Expiration_Date"] - today).dt.days
@@ -59,6 +93,33 @@ def main(uploaded_file_path):
             categories=["Expired", "Near_Expiry", "Not_Expired"]
         )
 
+    return df
+
+
+def main(uploaded_file_path):
+    """
+    Preprocesses an uploaded inventory and saves it to data/processed.
+
+    Args:
+        uploaded_file_path (str or pd.DataFrame): Path to the raw CSV, or an
+            already parsed frame (see src/ingestion.py) to avoid parsing twice.
+    """
+    PROCESSED_PATH = "data/processed/processed_data.csv"
+
+    if isinstance(uploaded_file_path, pd.DataFrame):
+        df = uploaded_file_path
+    else:
+        df = read_inventory_csv(uploaded_file_path)
+
+    # Debugging: Log column names and data at key steps
+    print("Columns in raw data:", df.columns.tolist())
+    print("Sample data:")
+    print(df.head())
+
+    df = clean_raw_data(df)
+    df = df.drop_duplicates()
+    df = add_derived_features(df)
+
     os.makedirs(os.path.dirname(PROCESSED_PATH), exist_ok=True)
     df.to_csv(PROCESSED_PATH, index=False)
 
@@ -66,4 +127,4 @@ def main(uploaded_file_path):
 
 # Optional: allow standalone execution
 if __name__ == "__main__":
-    main("data/raw/merged_inventory.csv")
\ No newline at end of file
+    main("data/raw/merged_inventory.csv")
@@ -0,0 +1,247 @@
+# src/delta_ingestion.py
+
+import argparse
+import json
+import os
+import pandas as pd
+
+from src.data_preprocessing import clean_raw_data, add_derived_features, robust_datetime_convert
+from src.ingestion import read_inventory_csv
+from src.scoring import ScoringModels, NUMERIC_COLUMNS
+
+STORE_PATH = "data/processed/processed_store.parquet"
+# Product_ID + Warehouse_Location alone is not unique: a location holds several
+# lots of a product, told apart by their expiration date
+KEY_COLUMNS = ["Product_ID", "Warehouse_Location", "Expiration_Date"]
+STRING_KEY_COLUMNS = ["Product_ID", "Warehouse_Location"]
+OPERATION_COLUMN = "Operation"
+
+RISK_OUTPUT_PATH = "data/external/risk_scores.csv"
+RECOMMENDATION_OUTPUT_PATH = "data/external/recommendations.csv"
+RECOMMENDATION_COLUMNS = [
+    "Product_ID", "Product_Name", "Category", "Supplier_Name", "Warehouse_Location",
+    "Stock_Quantity", "Stock_Value", "Risk_Level", "Predicted_Action", "Predicted_Discount_Percent"
+]
+
+
+def _meta_path(store_path):
+    return os.path.splitext(store_path)[0] + ".json"
+
+
+def load_store(store_path=STORE_PATH):
+    """
+    Loads the persisted processed store and the date it was computed for.
+
+    Returns:
+        tuple: (pd.DataFrame or None, pd.Timestamp or None)
+    """
+    if not os.path.exists(store_path):
+        return None, None
+    store = pd.read_parquet(store_path)
+    with open(_meta_path(store_path)) as f:
+        as_of = pd.Timestamp(json.load(f)["as_of"])
+    return store, as_of
+
+
+def save_store(store, as_of, store_path=STORE_PATH):
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+    store.to_parquet(store_path, index=False)
+    with open(_meta_path(store_path), "w") as f:
+        json.dump({"as_of": as_of.strftime("%Y-%m-%d"), "rows": len(store)}, f)
+
+
+def seed_store(as_of=None, risk_path=RISK_OUTPUT_PATH,
+               recommendations_path=RECOMMENDATION_OUTPUT_PATH, store_path=STORE_PATH):
+    """
+    Writes the processed store from the full pipeline's outputs, so later
+    delta uploads start from the complete inventory.
+
+    Args:
+        as_of (pd.Timestamp, optional): Date the outputs were computed for. Defaults to today.
+        risk_path (str): risk_scores.csv written by risk_scoring.main.
+        recommendations_path (str): recommendations.csv (same rows, same order).
+        store_path (str): Where to write the store.
+
+    Returns:
+        pd.DataFrame: The seeded store.
+    """
+    as_of = pd.Timestamp(as_of or "today").normalize()
+    # Key columns stay strings, as in delta files read through the Arrow schema;
+    # inferring numbers from IDs like "00123" would make the keys never match
+    store = pd.read_csv(
+        risk_path, parse_dates=["Date_Received", "Last_Order_Date", "Expiration_Date"],
+        dtype={col: str for col in STRING_KEY_COLUMNS},
+    )
+    recommendations = pd.read_csv(recommendations_path)
+    if len(recommendations) != len(store):
+        raise ValueError(
+            f"{recommendations_path} has {len(recommendations)} rows but {risk_path} has {len(store)}; "
+            "re-run the full pipeline"
+        )
+    for col in ["Predicted_Action", "Predicted_Discount_Percent"]:
+        store[col] = recommendations[col].to_numpy()
+
+    save_store(store, as_of, store_path)
+    print(f"✅ Processed store seeded with {len(store)} rows → {store_path}")
+    return store
+
+
+def roll_forward(store: pd.DataFrame, days: int) -> pd.DataFrame:
+    """
+    Shifts the date-relative feature columns by `days` without re-deriving
+    the rest. The model outputs depend on these columns, so rolled rows must
+    be rescored (see ingest_delta).
+
+    Args:
+        store (pd.DataFrame): Processed rows.
+        days (int): Number of days since the store was last computed.
+
+    Returns:
+        pd.DataFrame: The same frame, rolled forward in place.
+    """
+    store["Days_Until_Expiry"] = store["Days_Until_Expiry"] - days
+    store["Stock_Age"] = store["Stock_Age"] + days
+    store["Remaining_Shelf_Life_Ratio"] = (
+        store["Days_Until_Expiry"] / store["Shelf_Life"].where(store["Shelf_Life"] != 0)
+    ).clip(0, 1)
+    return store
+
+
+def _keys(df):
+    keys = df[KEY_COLUMNS].copy()
+    for col in STRING_KEY_COLUMNS:
+        keys[col] = keys[col].astype("string")
+    keys["Expiration_Date"] = keys["Expiration_Date"].astype("datetime64[ns]")
+    return pd.MultiIndex.from_frame(keys)
+
+
+def _key_mask(df, keys):
+    return _keys(df).isin(keys)
+
+
+def _examples(keys, limit=5):
+    shown = ", ".join(str(tuple(str(v) for v in key)) for key in list(keys)[:limit])
+    return shown + (" ..." if len(keys) > limit else "")
+
+
+def ingest_delta(delta_path, store_path=STORE_PATH, models=None, today=None):
+    """
+    Applies a delta file (inserts/updates/deletes keyed by Product_ID +
+    Warehouse_Location + Expiration_Date) to the processed store that the
+    full pipeline seeded. Only the delta rows are re-derived from raw
+    columns. When the date has moved on, the stored rows are rolled forward
+    and rescored in one vectorized pass, since demand, risk and the
+    recommendations all depend on the days left.
+
+    Args:
+        delta_path (str): CSV in the uploaded inventory schema. An optional
+            "Operation" column holds insert/update/upsert/delete (default upsert).
+            insert requires a new key, update and delete an existing one.
+        store_path (str): Path to the persisted processed store.
+        models (ScoringModels, optional): Loaded models; loaded from disk if None.
+        today (pd.Timestamp, optional): Reference date. Defaults to today.
+
+    Returns:
+        pd.DataFrame: The updated store.
+    """
+    today = pd.Timestamp(today or "today").normalize()
+
+    store, as_of = load_store(store_path)
+    if store is None:
+        # Starting from an empty store would make the exported outputs hold only the delta rows
+        raise FileNotFoundError(
+            f"❌ No processed store at {store_path}. Run the full pipeline once "
+            "(python run_pipeline.py <inventory.csv>) before applying deltas."
+        )
+    models = models or ScoringModels.load()
+
+    rolled = as_of != today
+    if rolled:
+        days = (today - as_of).days
+        store = roll_forward(store, days)
+        print(f"📅 Rolled store forward {days} day(s)")
+
+    delta = read_inventory_csv(delta_path)
+    if OPERATION_COLUMN in delta.columns:
+        operations = delta.pop(OPERATION_COLUMN).astype(str).str.strip().str.lower()
+    else:
+        operations = pd.Series("upsert", index=delta.index)
+
+    unknown = set(operations.unique()) - {"insert", "update", "upsert", "delete"}
+    if unknown:
+        raise ValueError(f"Unknown operations in delta file: {', '.join(sorted(unknown))}")
+
+    if not pd.api.types.is_datetime64_any_dtype(delta["Expiration_Date"]):
+        delta["Expiration_Date"] = robust_datetime_convert(delta["Expiration_Date"])
+    if delta["Expiration_Date"].isna().any():
+        raise ValueError("Delta rows need a valid Expiration_Date (part of the key)")
+
+    # The last operation per key wins; superseded rows are reported, not dropped silently
+    superseded = delta.duplicated(subset=KEY_COLUMNS, keep="last")
+    if superseded.any():
+        print(
+            f"⚠️ {superseded.sum()} delta row(s) superseded by a later row with the same key "
+            f"(last operation wins): {_examples(_keys(delta[superseded]).unique())}"
+        )
+    delta, operations = delta[~superseded], operations[~superseded]
+
+    delta_keys = _keys(delta)
+    exists = delta_keys.isin(_keys(store))
+    for operation, should_exist in [("insert", False), ("update", True), ("delete", True)]:
+        bad = (operations == operation).to_numpy() & (exists != should_exist)
+        if bad.any():
+            problem = "already exist" if operation == "insert" else "do not exist"
+            raise ValueError(f"{operation} of {bad.sum()} key(s) that {problem}: {_examples(delta_keys[bad])}")
+
+    deletes = delta[operations == "delete"]
+    upserts = delta[operations != "delete"]
+    store = store[~_key_mask(store, delta_keys)]
+
+    rescored = 0
+    if rolled and len(store):
+        store = models.score_processed(store.reset_index(drop=True), today=today)
+        rescored = len(store)
+
+    scored = []
+    if len(upserts):
+        upserts = clean_raw_data(upserts.reset_index(drop=True))
+        for col in NUMERIC_COLUMNS:
+            if col in upserts.columns:
+                upserts[col] = pd.to_numeric(upserts[col], errors="coerce")
+        upserts = add_derived_features(upserts, today=today)
+        scored.append(models.score_processed(upserts, today=today))
+
+    store = pd.concat([store] + scored, ignore_index=True)
+    save_store(store, today, store_path)
+
+    print(
+        f"✅ Delta applied: {len(upserts)} upserted, {len(deletes)} deleted, "
+        f"{rescored} rolled forward and rescored → {len(store)} rows in {store_path}"
+    )
+    return store
+
+
+def export_outputs(store, risk_path=RISK_OUTPUT_PATH, recommendations_path=RECOMMENDATION_OUTPUT_PATH):
+    """
+    Writes the store out in the same shape as the full pipeline outputs.
+    """
+    if store is None or store.empty:
+        raise ValueError("❌ Refusing to export an empty store over the full pipeline outputs")
+    os.makedirs(os.path.dirname(risk_path), exist_ok=True)
+    store.drop(columns=["Predicted_Action", "Predicted_Discount_Percent", "Risk_Level_Encoded"],
+               errors="ignore").to_csv(risk_path, index=False)
+    store[RECOMMENDATION_COLUMNS].to_csv(recommendations_path, index=False)
+    print(f"✅ Exported {risk_path} and {recommendations_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply an inventory delta file to the processed store")
+    parser.add_argument("delta_path")
+    parser.add_argument("--store", default=STORE_PATH)
+    parser.add_argument("--export", action="store_true",
+                        help="Also rewrite risk_scores.csv and recommendations.csv from the store")
+    args = parser.parse_args()
+
+    updated = ingest_delta(args.delta_path, store_path=args.store)
+    if args.export:
+        export_outputs(updated)
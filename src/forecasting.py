@@ -1,23 +1,120 @@
 # src/forecasting.py
 
+import argparse
+import hashlib
+import json
 import os
+import time
 import pandas as pd
 from prophet import Prophet
+from prophet.serialize import model_to_json, model_from_json
+
+# A previous fit whose noise scale (in Prophet's scaled y units) fell below this
+# interpolated its few points exactly; starting from it leaves L-BFGS stuck at
+# the degenerate optimum (up to its 10000-iteration cap), so those refit cold
+MIN_WARM_SIGMA_OBS = 1e-3
+
+
+def _history_hash(ts):
+    """Fingerprint of a product's training history, used for change detection."""
+    values = pd.util.hash_pandas_object(ts[["ds", "y"]], index=False).to_numpy()
+    return hashlib.sha1(values.tobytes()).hexdigest()
+
+
+def _load_fit_state(model_dir, safe_name):
+    model_file = os.path.join(model_dir, f"{safe_name}_model.json")
+    meta_file = os.path.join(model_dir, f"{safe_name}_meta.json")
+    if not (os.path.exists(model_file) and os.path.exists(meta_file)):
+        return None
+    with open(model_file) as f:
+        model = model_from_json(f.read())
+    with open(meta_file) as f:
+        meta = json.load(f)
+    return {"model": model, "meta": meta}
+
+
+def _save_fit_state(model_dir, safe_name, model, meta):
+    os.makedirs(model_dir, exist_ok=True)
+    with open(os.path.join(model_dir, f"{safe_name}_model.json"), "w") as f:
+        f.write(model_to_json(model))
+    with open(os.path.join(model_dir, f"{safe_name}_meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def _warm_start_init(state, ts):
+    """
+    Builds Stan initial values from a previously fitted model, or returns None
+    when the history changed structurally and a cold fit is needed.
+    """
+    if state is None:
+        return None
+    meta, previous = state["meta"], state["model"]
+
+    # A different start date or a shrunken history means the old fit is not a
+    # good starting point (rescaled time axis, re-placed changepoints)
+    if meta["start"] != str(ts["ds"].min().date()) or len(ts) < meta["n_points"]:
+        return None
+
+    init = {name: previous.params[name][0][0] for name in ["k", "m", "sigma_obs"]}
+    if init["sigma_obs"] < MIN_WARM_SIGMA_OBS:
+        return None
+    for name in ["delta", "beta"]:
+        init[name] = previous.params[name][0]
+    # Short histories gain changepoints as they grow; Prophet then falls back
+    # to its default for the mismatched delta and keeps the other warm values
+    return init
+
+
+def _optimizer_iterations(model):
+    try:
+        return int(len(model.stan_backend.stan_fit.optimized_iterations_np) - 1)
+    except Exception:
+        return None
+
 
 def main(preprocessed_csv_path="data/processed/processed_data.csv",
          forecast_dir="forecasts/product_level",
-         use_existing_forecast=True):
+         use_existing_forecast=True,
+         warm_start=True,
+         model_dir=None,
+         engine="prophet",
+         warm_init=False,
+         compare_cold=False):
     """
     Generates product-level forecasts using Prophet.
     If 'all_products_forecast.csv' exists and use_existing_forecast=True, it will be reused.
 
+    Each product's fitted model is saved (Prophet JSON serialization) next to
+    the forecasts. On the next run, products whose history is unchanged reuse
+    their saved forecast; every other product is refit from scratch unless
+    warm_init is set.
+
     Args:
         preprocessed_csv_path (str): Path to preprocessed data CSV.
         forecast_dir (str): Directory to save individual and combined forecasts.
         use_existing_forecast (bool): If True, reuse existing combined forecast if present.
+        warm_start (bool): If True, save per-product fits and reuse the forecast
+            of products whose history is unchanged.
+        model_dir (str, optional): Directory for saved fits. Defaults to forecast_dir/models.
+        engine (str): "prophet" for per-product fits, or "global" for one
+            cross-product model (see src/forecasting_global.py).
+        warm_init (bool): Opt-in: start refits of grown histories from the saved
+            parameters. Off by default because it measured slower than cold
+            fits (505 vs 317 L-BFGS iterations on the same 9 histories).
+        compare_cold (bool): Benchmark mode for warm_init: warm-start where
+            possible, also cold-fit those products on the same history, and
+            report both iteration counts and times.
     """
+    if engine == "global":
+        from src.forecasting_global import main as global_main
+        return global_main(preprocessed_csv_path, forecast_dir, use_existing_forecast)
+    if engine != "prophet":
+        raise ValueError(f"Unknown forecasting engine: {engine}")
+    warm_init = warm_init or compare_cold
+
     os.makedirs(forecast_dir, exist_ok=True)
     combined_forecast_path = os.path.join(forecast_dir, "all_products_forecast.csv")
+    model_dir = model_dir or os.path.join(forecast_dir, "models")
 
     # ✅ Check if combined forecast already exists
     if use_existing_forecast and os.path.exists(combined_forecast_path):
@@ -33,6 +130,8 @@ def main(preprocessed_csv_path="data/processed/processed_data.csv",
 
     forecast_horizon = 30  # days
     all_forecasts = []
+    stats = {mode: {"fits": 0, "iterations": 0, "seconds": 0.0} for mode in ["warm", "cold", "warm_vs_cold"]}
+    unchanged = 0
 
     for product, group in df_agg.groupby("Product_Name"):
         if len(group) < 5:
@@ -40,22 +139,68 @@ def main(preprocessed_csv_path="data/processed/processed_data.csv",
             continue
 
         ts = group.rename(columns={"Date_Received": "ds", "Sales_Volume": "y"})
+        safe_name = product.replace('/', '_')
+        out_file = os.path.join(forecast_dir, f"{safe_name}_forecast.csv")
+        history_hash = _history_hash(ts)
+        state = _load_fit_state(model_dir, safe_name) if warm_start else None
+
+        # Unchanged history → the saved forecast is still valid
+        if state and state["meta"]["history_hash"] == history_hash and os.path.exists(out_file):
+            forecast = pd.read_csv(out_file, parse_dates=["ds"])
+            forecast["Product_Name"] = product
+            all_forecasts.append(forecast[["ds", "yhat", "yhat_lower", "yhat_upper", "Product_Name"]])
+            unchanged += 1
+            continue
 
         # Train Prophet model
         model = Prophet(yearly_seasonality=False, weekly_seasonality=True, daily_seasonality=False)
-        model.fit(ts)
+        init = _warm_start_init(state, ts) if warm_init else None
+        # Per-iteration output is only kept to count iterations when benchmarking
+        fit_kwargs = {"save_iterations": True} if compare_cold else {}
+        if init is not None:
+            fit_kwargs["init"] = init
+
+        start = time.perf_counter()
+        model.fit(ts, **fit_kwargs)
+        elapsed = time.perf_counter() - start
+        iterations = _optimizer_iterations(model)
+
+        mode = "warm" if init is not None else "cold"
+        stats[mode]["fits"] += 1
+        stats[mode]["iterations"] += iterations or 0
+        stats[mode]["seconds"] += elapsed
+
+        if compare_cold and init is not None:
+            # Like-for-like reference: a cold fit on exactly the same history
+            cold_model = Prophet(yearly_seasonality=False, weekly_seasonality=True, daily_seasonality=False)
+            cold_start = time.perf_counter()
+            cold_model.fit(ts, save_iterations=True)
+            stats["warm_vs_cold"]["fits"] += 1
+            stats["warm_vs_cold"]["iterations"] += _optimizer_iterations(cold_model) or 0
+            stats["warm_vs_cold"]["seconds"] += time.perf_counter() - cold_start
+
+        meta = {
+            "history_hash": history_hash,
+            "start": str(ts["ds"].min().date()),
+            "n_points": len(ts),
+            "fit_seconds": elapsed,
+            "iterations": iterations,
+        }
+
+        if warm_start:
+            _save_fit_state(model_dir, safe_name, model, meta)
 
         # Create future dataframe
         future = model.make_future_dataframe(periods=forecast_horizon, freq="D")
         forecast = model.predict(future)
 
         # Save individual forecast CSV
-        out_file = os.path.join(forecast_dir, f"{product.replace('/', '_')}_forecast.csv")
         forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].to_csv(out_file, index=False)
         forecast["Product_Name"] = product
-        all_forecasts.append(forecast[["ds", "yhat", "Product_Name"]])
+        all_forecasts.append(forecast[["ds", "yhat", "yhat_lower", "yhat_upper", "Product_Name"]])
 
-        print(f"✅ Forecast saved for {product} → {out_file}")
+        counted = "" if iterations is None else f", {iterations} iterations"
+        print(f"✅ Forecast saved for {product} ({mode} fit{counted}, {elapsed:.2f}s) → {out_file}")
 
     # Save combined forecast
     if all_forecasts:
@@ -65,11 +210,29 @@ def main(preprocessed_csv_path="data/processed/processed_data.csv",
     else:
         print("\n⚠️ No forecasts generated. Not enough data per product.")
 
+    warm, cold = stats["warm"], stats["cold"]
+    print(
+        f"\n📊 Fits: {unchanged} unchanged (reused) | "
+        f"{warm['fits']} warm: {warm['seconds']:.1f}s | {cold['fits']} cold: {cold['seconds']:.1f}s"
+    )
+    if compare_cold:
+        reference = stats["warm_vs_cold"]
+        print(
+            f"⚖️ Same {reference['fits']} histories fit cold: {reference['iterations']} iterations, "
+            f"{reference['seconds']:.1f}s (warm: {warm['iterations']} iterations, {warm['seconds']:.1f}s)"
+        )
+
     return combined_forecast_path
 
 # Optional: allow standalone execution for testing
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Per-product Prophet demand forecasting")
+    parser.add_argument("--warm-init", action="store_true",
+                        help="Start refits of grown histories from the saved parameters (opt-in)")
+    parser.add_argument("--compare-cold", action="store_true",
+                        help="Warm-start where possible and also cold-fit those products to benchmark warm starts")
+    args = parser.parse_args()
+    main(use_existing_forecast=not args.compare_cold, warm_init=args.warm_init, compare_cold=args.compare_cold)
 
 
 # # src/forecasting.py
@@ -0,0 +1,83 @@
+# src/ingestion.py
+
+import warnings
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# Known uploaded inventory schema. Unit_Price stays a string because uploads
+# carry currency formatting ("$2.00 "), which clean_raw_data strips.
+INVENTORY_SCHEMA = {
+    "Product_ID": pa.string(),
+    "Product_Name": pa.string(),
+    "Category": pa.string(),
+    "Supplier_ID": pa.string(),
+    "Supplier_Name": pa.string(),
+    "Stock_Quantity": pa.int64(),
+    "Reorder_Level": pa.int64(),
+    "Reorder_Quantity": pa.int64(),
+    "Unit_Price": pa.string(),
+    "Date_Received": pa.timestamp("s"),
+    "Last_Order_Date": pa.timestamp("s"),
+    "Expiration_Date": pa.timestamp("s"),
+    "Warehouse_Location": pa.string(),
+    "Sales_Volume": pa.int64(),
+    "Inventory_Turnover_Rate": pa.float64(),
+    "Status": pa.string(),
+    "Expiry_Class": pa.string(),
+}
+
+# Tried in order per value. Uploads use ISO or day-first dates ("29-10-2025");
+# month-first only applies when a value cannot be read day-first
+DATE_FORMATS = ["%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d", "%m-%d-%Y", "%m/%d/%Y"]
+
+
+def _as_buffer(source):
+    """Raw bytes / file-like uploads become an Arrow buffer; paths pass through."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return pa.py_buffer(bytes(source))
+    if hasattr(source, "getvalue"):
+        return pa.py_buffer(source.getvalue())
+    if hasattr(source, "read"):
+        return pa.py_buffer(source.read())
+    return str(source)
+
+
+def read_inventory_csv(source) -> pd.DataFrame:
+    """
+    Parses an inventory CSV once with pyarrow's multi-threaded reader, using
+    explicit types and date formats for the known columns. If a value does
+    not fit the explicit types, the file is re-read with those columns as
+    strings: numeric columns are coerced (unparseable values become NaN) and
+    date columns are left for clean_raw_data to parse robustly.
+
+    Args:
+        source: Path, raw bytes, or file-like object (e.g. a Streamlit upload).
+
+    Returns:
+        pd.DataFrame: Typed inventory rows.
+    """
+    source = _as_buffer(source)
+
+    def read(column_types):
+        return pacsv.read_csv(
+            pa.BufferReader(source) if isinstance(source, pa.Buffer) else source,
+            read_options=pacsv.ReadOptions(use_threads=True),
+            convert_options=pacsv.ConvertOptions(
+                column_types=column_types,
+                timestamp_parsers=DATE_FORMATS,
+                strings_can_be_null=True,
+            ),
+        )
+
+    try:
+        table = read(INVENTORY_SCHEMA)
+    except pa.ArrowInvalid as e:
+        warnings.warn(f"Typed CSV parse failed ({e}); re-reading the known columns as strings", stacklevel=2)
+        df = read({col: pa.string() for col in INVENTORY_SCHEMA}).to_pandas()
+        for col, dtype in INVENTORY_SCHEMA.items():
+            if col in df.columns and (pa.types.is_integer(dtype) or pa.types.is_floating(dtype)):
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+        return df
+
+    return table.to_pandas()
@@ -1,10 +1,25 @@
 # src/modelling.py
 
+import argparse
+import json
+import os
+import time
 import joblib
 import pandas as pd
 
 MODEL_PATH = "models/best_model.pkl"
 ENCODER_PATH = "models/label_encoder.pkl"
+MODEL_CARD_PATH = "models/model_card.json"
+CACHE_DIR = ".cache/modelling"
+# Labelled raw inventory. Not data/processed/processed_data.csv: run_pipeline.py
+# overwrites its Expiry_Class with the saved model's own predictions
+TRAINING_DATA_PATH = "data/raw/merged_inventory.csv"
+
+SELECTED_FEATURES = [
+    "Category", "Shelf_Life", "Stock_Quantity", "Stock_Value",
+    "Sales_Volume", "Inventory_Turnover_Rate", "Unit_Price",
+    "Days_Until_Expiry", "Remaining_Shelf_Life_Ratio", "Stock_Age"
+]
 
 def load_trained_model():
     """
@@ -24,173 +39,288 @@ def load_trained_model():
             "Run training script to generate best_model.pkl and label_encoder.pkl."
         )
 
-def predict_expiry_class(df: pd.DataFrame):
+def expiry_feature_encoder(model, capacity=1024):
+    """
+    Encoder for the Expiry_Class model's saved column layout: numeric
+    SELECTED_FEATURES as they are, one indicator per training Category_<level>
+    column, and NaN as 0 (as in training).
+
+    Args:
+        model: Fitted model with feature_names_in_.
+        capacity (int): Rows preallocated in the encoder's buffer.
+
+    Returns:
+        FeatureEncoder: See src/tree_compiler.py.
+    """
+    from src.tree_compiler import FeatureEncoder
+    return FeatureEncoder(model.feature_names_in_, SELECTED_FEATURES, capacity=capacity, fill_value=0)
+
+def predict_expiry_class(df: pd.DataFrame, model=None, label_encoder=None, features=None):
     """
     Uses the saved model to predict the Expiry_Class for new data.
 
     Args:
         df (pd.DataFrame): Preprocessed dataframe ready for prediction.
+        model (optional): Already loaded model; loaded from disk if None.
+        label_encoder (optional): Already loaded label encoder; loaded from disk if None.
+        features (FeatureEncoder, optional): Encoder from expiry_feature_encoder(model),
+            reused across calls; built per call if None.
 
     Returns:
         pd.Series: Predicted Expiry_Class values (decoded).
     """
-    model, label_encoder = load_trained_model()
-
-    # ✅ The same features used during training
-    selected_features = [
-        "Category", "Shelf_Life", "Stock_Quantity", "Stock_Value",
-        "Sales_Volume", "Inventory_Turnover_Rate", "Unit_Price",
-        "Days_Until_Expiry", "Remaining_Shelf_Life_Ratio", "Stock_Age"
-    ]
+    if model is None or label_encoder is None:
+        model, label_encoder = load_trained_model()
 
     # Filter expected columns
-    missing_cols = [col for col in selected_features if col not in df.columns]
+    missing_cols = [col for col in SELECTED_FEATURES if col not in df.columns]
     if missing_cols:
         raise ValueError(f"❌ Missing required columns for prediction: {missing_cols}")
 
-    X = df[selected_features]
-    X = pd.get_dummies(X, drop_first=True)
-
-    # Handle missing values
-    X = X.fillna(0)  # Replace NaN values with 0 or use an appropriate imputation strategy
-
-    # Align with training features
-    model_features = model.feature_names_in_
-    X = X.reindex(columns=model_features, fill_value=0)
+    # Encode with the saved training column layout, so a row is encoded the same
+    # way whatever else is in the batch (get_dummies(drop_first=True) on a batch
+    # drops the batch's first Category instead of the training one)
+    features = features or expiry_feature_encoder(model)
+    X = pd.DataFrame(features.encode(df), columns=features.feature_names, index=df.index)
 
     preds_enc = model.predict(X)
     preds = label_encoder.inverse_transform(preds_enc)
 
     return preds
 
-if __name__ == "__main__":
-    # If still used directly for debugging
+def _candidate_models():
+    """
+    Candidate estimators and their grids. Tree models are wrapped in an
+    imblearn Pipeline so SMOTE is fitted inside each CV fold only.
+    """
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+    from imblearn.over_sampling import SMOTE
+    from imblearn.pipeline import Pipeline as SamplingPipeline
+
+    def with_smote(clf):
+        return SamplingPipeline([("smote", SMOTE(random_state=42)), ("clf", clf)])
+
+    candidates = {
+        "Logistic Regression": (
+            Pipeline([
+                ("scaler", StandardScaler()),
+                ("clf", LogisticRegression(max_iter=2000, class_weight="balanced", random_state=42))
+            ]),
+            {}
+        ),
+        "Random Forest": (
+            with_smote(RandomForestClassifier(random_state=42)),
+            {"n_estimators": [100, 200], "max_depth": [5, 10, None], "min_samples_split": [2, 5]}
+        ),
+        "Gradient Boosting": (
+            with_smote(GradientBoostingClassifier(random_state=42)),
+            {"n_estimators": [100, 200], "learning_rate": [0.05, 0.1], "max_depth": [3, 5]}
+        ),
+    }
+
+    # XGBoost is optional
     try:
-        sample_df = pd.read_csv("data/processed/processed_data.csv")
-        preds = predict_expiry_class(sample_df)
-        print("Sample Predictions:", preds[:10])
-    except Exception as e:
-        print("❌ Error:", e)
-
-
-
-# # src/modelling.py
-
-# def train_models():
-#     import pandas as pd
-#     import numpy as np
-#     import joblib
-#     from sklearn.model_selection import train_test_split, GridSearchCV
-#     from sklearn.preprocessing import StandardScaler, LabelEncoder
-#     from sklearn.pipeline import Pipeline
-#     from sklearn.metrics import (
-#         accuracy_score, roc_auc_score, classification_report,
-#         confusion_matrix, f1_score
-#     )
-#     from sklearn.linear_model import LogisticRegression
-#     from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-#     from imblearn.over_sampling import SMOTE
-#     import xgboost as xgb
-
-#     # Load processed data
-#     df = pd.read_csv("data/processed/processed_data.csv")
-
-#     selected_features = [
-#         "Category", "Shelf_Life", "Stock_Quantity", "Stock_Value",
-#         "Sales_Volume", "Inventory_Turnover_Rate", "Unit_Price",
-#         "Days_Until_Expiry", "Remaining_Shelf_Life_Ratio", "Stock_Age"
-#     ]
-
-#     print(f"\n🚀 Running with EXPANDED SAFE features: {selected_features}\n")
-
-#     X = df[selected_features]
-#     y = df["Expiry_Class"]
-
-#     le = LabelEncoder()
-#     y_enc = le.fit_transform(y)
-#     joblib.dump(le, "models/label_encoder.pkl")
-
-#     X = pd.get_dummies(X, drop_first=True)
-
-#     X_train, X_test, y_train, y_test = train_test_split(
-#         X, y_enc, test_size=0.3, random_state=42, stratify=y_enc
-#     )
-
-#     models = {
-#         "Logistic Regression": Pipeline([
-#             ("scaler", StandardScaler()),
-#             ("clf", LogisticRegression(max_iter=2000, class_weight="balanced", random_state=42))
-#         ]),
-#         "Random Forest": GridSearchCV(
-#             RandomForestClassifier(random_state=42),
-#             param_grid={
-#                 "n_estimators": [100, 200],
-#                 "max_depth": [5, 10, None],
-#                 "min_samples_split": [2, 5]
-#             },
-#             cv=3, scoring="f1_macro", n_jobs=-1
-#         ),
-#         "Gradient Boosting": GridSearchCV(
-#             GradientBoostingClassifier(random_state=42),
-#             param_grid={
-#                 "n_estimators": [100, 200],
-#                 "learning_rate": [0.05, 0.1],
-#                 "max_depth": [3, 5]
-#             },
-#             cv=3, scoring="f1_macro", n_jobs=-1
-#         ),
-#         "XGBoost": GridSearchCV(
-#             xgb.XGBClassifier(random_state=42, eval_metric="mlogloss"),
-#             param_grid={
-#                 "n_estimators": [100, 200],
-#                 "learning_rate": [0.05, 0.1],
-#                 "max_depth": [3, 5, 7]
-#             },
-#             cv=3, scoring="f1_macro", n_jobs=-1
-#         )
-#     }
-
-#     results = {}
-
-#     for name, model in models.items():
-#         print(f"\n🔹 Training {name}...")
-
-#         if name == "Logistic Regression":
-#             model.fit(X_train, y_train)
-#             y_pred = model.predict(X_test)
-#         else:
-#             sm = SMOTE(random_state=42)
-#             X_res, y_res = sm.fit_resample(X_train, y_train)
-#             model.fit(X_res, y_res)
-#             y_pred = model.predict(X_test)
-
-#         acc = accuracy_score(y_test, y_pred)
-#         f1 = f1_score(y_test, y_pred, average="macro")
-#         try:
-#             roc = roc_auc_score(y_test, model.predict_proba(X_test), multi_class="ovo", average="macro")
-#         except Exception:
-#             roc = None
-
-#         print(f"Accuracy: {acc}")
-#         print(f"F1 (macro): {f1}")
-#         if roc:
-#             print(f"ROC AUC (macro): {roc}")
-#         print("Confusion Matrix:\n", confusion_matrix(y_test, y_pred))
-#         print("Classification Report:\n", classification_report(le.inverse_transform(y_test), le.inverse_transform(y_pred)))
-
-#         results[name] = {"accuracy": acc, "f1_macro": f1, "roc_auc": roc}
-
-#     print("\n✅ Done. Results summary:", results)
-#     best_model = max(results, key=lambda x: results[x]["f1_macro"])
-#     print(f"\n🏆 Best model: {best_model} with F1 = {results[best_model]['f1_macro']}")
-
-#     final_model = models[best_model]
-#     if isinstance(final_model, GridSearchCV):
-#         final_model = final_model.best_estimator_
-
-#     joblib.dump(final_model, "models/best_model.pkl")
-#     print("✅ Best model + label encoder saved to /models/")
-
-# # Optional: allow standalone execution
-# if __name__ == "__main__":
-#     train_models()
\ No newline at end of file
+        import xgboost as xgb
+        candidates["XGBoost"] = (
+            with_smote(xgb.XGBClassifier(random_state=42, eval_metric="mlogloss", n_jobs=1)),
+            {"n_estimators": [100, 200], "learning_rate": [0.05, 0.1], "max_depth": [3, 5, 7]}
+        )
+    except ImportError:
+        print("⚠️ xgboost not installed → skipping XGBoost candidate")
+
+    return candidates
+
+
+def _encode_features(data_path, data_mtime, today):
+    """
+    Preprocesses labelled raw data in memory and builds the encoded feature
+    matrix. data_mtime and today only key the joblib.Memory cache on the file
+    version and the date the derived features are relative to.
+    """
+    from sklearn.preprocessing import LabelEncoder
+    from src.data_preprocessing import clean_raw_data, add_derived_features
+    from src.ingestion import read_inventory_csv
+
+    df = read_inventory_csv(data_path)
+    if "Expiry_Class" not in df.columns:
+        raise ValueError(f"❌ {data_path} has no Expiry_Class labels to train on")
+    df = add_derived_features(clean_raw_data(df).drop_duplicates(), today=pd.Timestamp(today))
+    df = df.dropna(subset=["Expiry_Class"])
+    X = pd.get_dummies(df[SELECTED_FEATURES], drop_first=True).fillna(0).astype(float)
+
+    le = LabelEncoder()
+    y = le.fit_transform(df["Expiry_Class"].astype(str).str.strip())
+    return X, y, le
+
+
+def _fit_and_score(estimator, params, X, y, train_idx, test_idx):
+    """Fits one candidate on one CV fold and returns its macro-F1."""
+    from sklearn.base import clone
+    from sklearn.metrics import f1_score
+
+    estimator = clone(estimator).set_params(**{f"clf__{k}": v for k, v in params.items()})
+    estimator.fit(X[train_idx], y[train_idx])
+    return f1_score(y[test_idx], estimator.predict(X[test_idx]), average="macro")
+
+
+def train_models(data_path=TRAINING_DATA_PATH,
+                 model_path=MODEL_PATH,
+                 encoder_path=ENCODER_PATH,
+                 model_card_path=MODEL_CARD_PATH,
+                 cache_dir=CACHE_DIR,
+                 cv=3,
+                 n_jobs=-1):
+    """
+    Trains the Expiry_Class candidates and saves the best one.
+
+    Every (candidate, grid point, fold) fit runs in one shared process pool,
+    SMOTE is applied inside each fold, and both the encoded features and the
+    per-fold scores are cached with joblib.Memory, so re-running after adding
+    a grid point only fits the new ones.
+
+    Args:
+        data_path (str): Raw inventory CSV with ground-truth Expiry_Class labels.
+        model_path (str): Where to save the best model.
+        encoder_path (str): Where to save the Expiry_Class LabelEncoder.
+        model_card_path (str): Where to save training time and metrics (JSON).
+        cache_dir (str): joblib.Memory cache location (None disables caching).
+        cv (int): Number of stratified CV folds.
+        n_jobs (int): Worker processes shared by all searches (-1 = all cores).
+
+    Returns:
+        dict: The model card.
+    """
+    from joblib import Memory, Parallel, delayed
+    from sklearn.base import clone
+    from sklearn.model_selection import train_test_split, StratifiedKFold, ParameterGrid
+    from sklearn.metrics import (
+        accuracy_score, roc_auc_score, classification_report,
+        confusion_matrix, f1_score
+    )
+
+    start = time.perf_counter()
+    memory = Memory(cache_dir, verbose=0)
+
+    today = str(pd.Timestamp("today").normalize().date())
+    X, y, le = memory.cache(_encode_features)(data_path, os.path.getmtime(data_path), today)
+    print(f"\n🚀 Training on {len(X)} rows with features: {SELECTED_FEATURES}\n")
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.3, random_state=42, stratify=y
+    )
+    X_train_np = X_train.to_numpy()
+    folds = list(StratifiedKFold(n_splits=cv, shuffle=True, random_state=42).split(X_train_np, y_train))
+
+    candidates = _candidate_models()
+    tasks = [
+        (name, params, fold)
+        for name, (_, grid) in candidates.items()
+        for params in ParameterGrid(grid)
+        for fold in range(len(folds))
+    ]
+
+    fit_and_score = memory.cache(_fit_and_score)
+    task_args = [
+        (candidates[name][0], params, X_train_np, y_train, folds[fold][0], folds[fold][1])
+        for name, params, fold in tasks
+    ]
+    cached = sum(fit_and_score.check_call_in_cache(*args) for args in task_args)
+    print(f"🔹 {len(tasks)} fold fits across {len(candidates)} candidates ({cached} cached)")
+
+    search_start = time.perf_counter()
+    scores = Parallel(n_jobs=n_jobs)(delayed(fit_and_score)(*args) for args in task_args)
+    search_seconds = time.perf_counter() - search_start
+
+    # Mean CV score per (candidate, grid point) → best grid point per candidate
+    cv_results = (
+        pd.DataFrame({"name": [t[0] for t in tasks],
+                      "params": [json.dumps(t[1], sort_keys=True) for t in tasks],
+                      "f1_macro": scores})
+        .groupby(["name", "params"], sort=False)["f1_macro"].mean()
+        .reset_index()
+    )
+    best_per_candidate = cv_results.loc[cv_results.groupby("name", sort=False)["f1_macro"].idxmax()]
+
+    results = {}
+    fitted = {}
+    for row in best_per_candidate.itertuples():
+        params = json.loads(row.params)
+        estimator = clone(candidates[row.name][0]).set_params(**{f"clf__{k}": v for k, v in params.items()})
+        estimator.fit(X_train, y_train)
+        y_pred = estimator.predict(X_test)
+        try:
+            roc = roc_auc_score(y_test, estimator.predict_proba(X_test), multi_class="ovo", average="macro")
+        except Exception:
+            roc = None
+
+        print(f"\n🔹 {row.name} (best params {params}, CV F1 {row.f1_macro:.4f})")
+        print(f"Accuracy: {accuracy_score(y_test, y_pred)}")
+        print(f"F1 (macro): {f1_score(y_test, y_pred, average='macro')}")
+        if roc:
+            print(f"ROC AUC (macro): {roc}")
+        print("Confusion Matrix:\n", confusion_matrix(y_test, y_pred))
+        print("Classification Report:\n", classification_report(le.inverse_transform(y_test), le.inverse_transform(y_pred)))
+
+        fitted[row.name] = estimator
+        results[row.name] = {
+            "params": params,
+            "cv_f1_macro": row.f1_macro,
+            "accuracy": accuracy_score(y_test, y_pred),
+            "f1_macro": f1_score(y_test, y_pred, average="macro"),
+            "roc_auc": roc,
+        }
+
+    best_model = max(results, key=lambda x: results[x]["f1_macro"])
+    print(f"\n🏆 Best model: {best_model} with F1 = {results[best_model]['f1_macro']}")
+
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    joblib.dump(fitted[best_model], model_path)
+    joblib.dump(le, encoder_path)
+
+    model_card = {
+        "trained_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "data_path": data_path,
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "features": list(X.columns),
+        "classes": le.classes_.tolist(),
+        "cv_folds": cv,
+        "fold_fits": len(tasks),
+        "fold_fits_cached": int(cached),
+        "search_seconds": search_seconds,
+        "training_seconds": time.perf_counter() - start,
+        "best_model": best_model,
+        "candidates": results,
+    }
+    with open(model_card_path, "w") as f:
+        json.dump(model_card, f, indent=2, default=float)
+
+    print(f"✅ Best model + label encoder saved to {os.path.dirname(model_path)}/ "
+          f"(model card → {model_card_path}, {model_card['training_seconds']:.1f}s)")
+    return model_card
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expiry_Class model training and prediction")
+    subparsers = parser.add_subparsers(dest="command")
+    train_parser = subparsers.add_parser("train", help="Train candidates and save the best model")
+    train_parser.add_argument("--data", default=TRAINING_DATA_PATH,
+                              help="Raw inventory CSV with ground-truth Expiry_Class labels")
+    train_parser.add_argument("--cv", type=int, default=3)
+    train_parser.add_argument("--n-jobs", type=int, default=-1)
+    train_parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        train_models(args.data, cache_dir=args.cache_dir, cv=args.cv, n_jobs=args.n_jobs)
+    else:
+        # If still used directly for debugging
+        try:
+            sample_df = pd.read_csv("data/processed/processed_data.csv")
+            preds = predict_expiry_class(sample_df)
+            print("Sample Predictions:", preds[:10])
+        except Exception as e:
+            print("❌ Error:", e)
@@ -0,0 +1,179 @@
+# src/ranking.py
+
+import argparse
+import heapq
+import itertools
+import os
+import numpy as np
+import pandas as pd
+
+RECOMMENDATIONS_PATH = "data/external/recommendations.csv"
+REPORT_DIR = "data/external/reports"
+
+# Risk levels whose stock value counts as "at risk" when no Risk_Probability is available
+AT_RISK_LEVELS = ["Expired", "High", "Medium"]
+GROUP_COLUMNS = ["Category", "Warehouse_Location"]
+REPORT_COLUMNS = [
+    "Product_ID", "Product_Name", "Category", "Warehouse_Location", "Stock_Quantity",
+    "Stock_Value", "Risk_Level", "Risk_Probability", "Predicted_Action",
+    "Predicted_Discount_Percent", "Money_At_Risk"
+]
+
+
+class TopK:
+    """
+    Bounded min-heap keeping the k largest items seen so far.
+    Ties keep the item that arrived first.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._order = itertools.count()
+
+    def push(self, value, item):
+        # Negated arrival order: on equal values the earlier item compares larger
+        entry = (value, -next(self._order), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def threshold(self):
+        """Smallest value still in the heap once it is full (None until then)."""
+        return self._heap[0][0] if len(self._heap) == self.k else None
+
+    def items(self):
+        """Kept items, largest first."""
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+
+def money_at_risk(df: pd.DataFrame) -> np.ndarray:
+    """
+    Stock value expected to be lost per row: Stock_Value weighted by
+    Risk_Probability when the probabilistic risk scores are present,
+    otherwise the full Stock_Value of Expired/High/Medium rows.
+
+    Args:
+        df (pd.DataFrame): Risk or recommendation rows with Stock_Value
+            (or Stock_Quantity and Unit_Price) and Risk_Level.
+
+    Returns:
+        np.ndarray: Money at risk per row (0 for rows not at risk).
+    """
+    if "Stock_Value" in df.columns:
+        value = pd.to_numeric(df["Stock_Value"], errors="coerce")
+    else:
+        value = pd.to_numeric(df["Stock_Quantity"], errors="coerce") * pd.to_numeric(df["Unit_Price"], errors="coerce")
+    value = value.fillna(0).to_numpy(dtype=float)
+
+    at_risk = df["Risk_Level"].isin(AT_RISK_LEVELS).to_numpy()
+    if "Risk_Probability" in df.columns:
+        probability = pd.to_numeric(df["Risk_Probability"], errors="coerce").to_numpy(dtype=float)
+        # Expired rows, and rows without a forecast, fall back to the risk level
+        weight = np.where(np.isnan(probability), at_risk, probability)
+        weight = np.where(df["Risk_Level"].eq("Expired").to_numpy(), 1.0, weight)
+    else:
+        weight = at_risk.astype(float)
+    return value * weight
+
+
+def _iter_chunks(source, chunksize):
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+        return
+
+    header = pd.read_csv(source, nrows=0).columns
+    if "Stock_Value" not in header and not {"Stock_Quantity", "Unit_Price"} <= set(header):
+        raise ValueError(f"{source} has no Stock_Value (or Stock_Quantity and Unit_Price) column")
+    usecols = [col for col in REPORT_COLUMNS + ["Unit_Price"] if col in header]
+    yield from pd.read_csv(source, usecols=usecols, chunksize=chunksize)
+
+
+def rank_money_at_risk(source=RECOMMENDATIONS_PATH, k=10, group_columns=GROUP_COLUMNS, chunksize=100_000):
+    """
+    Streams risk/recommendation rows in chunks and keeps the top-k items by
+    money at risk overall and per group, without loading the file whole.
+    Memory stays O(chunksize + k × number of groups).
+
+    Args:
+        source (str or pd.DataFrame): CSV path (risk_scores.csv or
+            recommendations.csv) or an already loaded frame.
+        k (int): Items to keep per ranking.
+        group_columns (list): Columns to rank within (missing ones are skipped).
+        chunksize (int): Rows read per chunk.
+
+    Returns:
+        dict: "overall" → pd.DataFrame of the top-k items, and one frame per
+            group column with the top-k items of every group, largest first.
+            The frames keep their columns when nothing is at risk.
+    """
+    overall = TopK(k)
+    per_group = {col: {} for col in group_columns}
+    columns = None
+
+    for chunk in _iter_chunks(source, chunksize):
+        chunk = chunk.assign(Money_At_Risk=money_at_risk(chunk))
+        if columns is None:
+            columns = [col for col in REPORT_COLUMNS if col in chunk.columns]
+        chunk = chunk[chunk["Money_At_Risk"] > 0]
+        if chunk.empty:
+            continue
+        # Stable sort so the within-chunk pre-reduction keeps file order on ties
+        chunk = chunk.sort_values("Money_At_Risk", ascending=False, kind="stable")
+
+        # Only a chunk's own top-k can enter the overall heap; skip the rest
+        candidates = chunk.head(k)
+        threshold = overall.threshold()
+        if threshold is not None:
+            candidates = candidates[candidates["Money_At_Risk"] >= threshold]
+        for row in candidates[columns].itertuples(index=False):
+            overall.push(row.Money_At_Risk, row)
+
+        for col, heaps in per_group.items():
+            if col not in chunk.columns:
+                continue
+            for row in chunk.groupby(col, sort=False).head(k)[columns].itertuples(index=False):
+                group = getattr(row, col)
+                heaps.setdefault(group, TopK(k)).push(row.Money_At_Risk, row)
+
+    # Nothing at risk still yields frames with the report columns
+    def to_frame(rows):
+        return pd.DataFrame(rows, columns=columns or REPORT_COLUMNS)
+
+    report = {"overall": to_frame(overall.items())}
+    for col, heaps in per_group.items():
+        rows = []
+        # Groups with the most money at risk first
+        for group in sorted(heaps, key=lambda g: -sum(r.Money_At_Risk for r in heaps[g].items())):
+            rows.extend(heaps[group].items())
+        report[col] = to_frame(rows)
+    return report
+
+
+def write_report(report, output_dir=REPORT_DIR):
+    """
+    Writes one CSV per ranking (top_risk_overall.csv, top_risk_by_<column>.csv).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    for name, frame in report.items():
+        file_name = "top_risk_overall.csv" if name == "overall" else f"top_risk_by_{name.lower()}.csv"
+        frame.to_csv(os.path.join(output_dir, file_name), index=False)
+    print(f"✅ Money-at-risk report saved to {output_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prioritized money-at-risk worklist from risk/recommendation output")
+    parser.add_argument("--input", default=RECOMMENDATIONS_PATH,
+                        help="recommendations.csv or risk_scores.csv (any size)")
+    parser.add_argument("--k", type=int, default=10, help="Items per ranking")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--output-dir", default=REPORT_DIR)
+    args = parser.parse_args()
+
+    report = rank_money_at_risk(args.input, k=args.k, chunksize=args.chunksize)
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(f"\n💰 Top {args.k} items by money at risk")
+        print(report["overall"].to_string(index=False))
+    write_report(report, args.output_dir)
@@ -0,0 +1,55 @@
+"""
+Training Backends
+-----------------
+- Builds the action classifier / discount regressor for a chosen backend
+  ("forest": multi-core random forests, "hist_gb": histogram gradient boosting)
+- Caps very large training sets with (stratified) subsampling
+"""
+
+import numpy as np
+from sklearn.ensemble import (
+    RandomForestClassifier, RandomForestRegressor,
+    HistGradientBoostingClassifier, HistGradientBoostingRegressor
+)
+
+BACKENDS = ("forest", "hist_gb")
+
+def make_classifier(backend="forest", n_jobs=-1, random_state=42):
+    if backend == "forest":
+        return RandomForestClassifier(random_state=random_state, class_weight="balanced", n_jobs=n_jobs)
+    if backend == "hist_gb":
+        return HistGradientBoostingClassifier(random_state=random_state, class_weight="balanced")
+    raise ValueError(f"Unknown training backend: {backend} (expected one of {BACKENDS})")
+
+def make_regressor(backend="forest", n_jobs=-1, random_state=42):
+    if backend == "forest":
+        return RandomForestRegressor(random_state=random_state, n_jobs=n_jobs)
+    if backend == "hist_gb":
+        return HistGradientBoostingRegressor(random_state=random_state)
+    raise ValueError(f"Unknown training backend: {backend} (expected one of {BACKENDS})")
+
+def cap_rows(X, y, max_rows=None, stratify=False, random_state=42):
+    """
+    Subsamples (X, y) to at most max_rows rows. With stratify=True every class
+    keeps its share of the rows (and at least one row).
+    """
+    n = len(y)
+    if max_rows is None or n <= max_rows:
+        return X, y
+
+    rng = np.random.default_rng(random_state)
+    if stratify:
+        y_arr = np.asarray(y)
+        classes, inverse, counts = np.unique(y_arr, return_inverse=True, return_counts=True)
+        quotas = np.maximum(np.floor(counts * max_rows / n).astype(int), 1)
+        # Shuffle once, then keep the first `quota` rows of each class
+        order = rng.permutation(n)
+        rank = np.empty(n, dtype=np.int64)
+        sorted_by_class = order[np.argsort(inverse[order], kind="stable")]
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        rank[sorted_by_class] = np.arange(n) - np.repeat(starts, counts)
+        keep = np.sort(np.nonzero(rank < quotas[inverse])[0])
+    else:
+        keep = np.sort(rng.choice(n, size=max_rows, replace=False))
+
+    return X.iloc[keep], (y.iloc[keep] if hasattr(y, "iloc") else np.asarray(y)[keep])
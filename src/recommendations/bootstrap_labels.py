@@ -1,7 +1,7 @@
 """
 Bootstrap Labels
 ----------------
-- Generates initial 'Action' labels from Risk_Level
+- Generates initial 'Action' labels from Risk_Level (and the relocation plan)
 - Generates bootstrap 'Discount_Percent' for Discount actions
 """
 
@@ -16,8 +16,8 @@ def bootstrap_action(row):
         # Decide between Bundle, Relocate, Monitor
         if row["Inventory_Turnover_Rate"] < 10 and row["Stock_Age"] > 180:
             return "Bundle"
-        elif row["Warehouse_Location"].startswith("5") or row["Warehouse_Location"].startswith("9"):
-            # Example heuristic: relocate certain warehouse locations
+        elif row.get("Relocation_Source", False):
+            # Location ships surplus stock in the relocation plan (see relocation.py)
             return "Relocate"
         else:
             return "Monitor"
@@ -6,20 +6,25 @@ Feature Engineering
 """
 
 import pandas as pd
-from sklearn.preprocessing import LabelEncoder
+
+# Sorted so the codes match what a LabelEncoder fitted on all levels produces
+# ("Medium" only comes from probabilistic risk scoring)
+RISK_LEVELS = ["Expired", "High", "Low", "Medium"]
+
+FEATURE_COLS = [
+    "Stock_Quantity", "Reorder_Level", "Reorder_Quantity", "Unit_Price",
+    "Sales_Volume", "Inventory_Turnover_Rate", "Days_Until_Expiry",
+    "Stock_Age", "Stock_Value", "Shelf_Life", "Remaining_Shelf_Life_Ratio",
+    "Forecasted_Demand"
+]
 
 def prepare_features(df: pd.DataFrame):
-    feature_cols = [
-        "Stock_Quantity", "Reorder_Level", "Reorder_Quantity", "Unit_Price",
-        "Sales_Volume", "Inventory_Turnover_Rate", "Days_Until_Expiry",
-        "Stock_Age", "Stock_Value", "Shelf_Life", "Remaining_Shelf_Life_Ratio",
-        "Forecasted_Demand"
-    ]
+    feature_cols = list(FEATURE_COLS)
 
-    # Encode Risk_Level
-    risk_encoder = LabelEncoder()
-    df["Risk_Level_Encoded"] = risk_encoder.fit_transform(df["Risk_Level"])
+    # Encode Risk_Level with a fixed vocabulary so a batch missing a level
+    # (e.g. a single scored row) still gets the codes the models were trained on
+    df["Risk_Level_Encoded"] = pd.Categorical(df["Risk_Level"], categories=RISK_LEVELS).codes
     feature_cols.append("Risk_Level_Encoded")
 
     X = df[feature_cols]
-    return X, feature_cols
\ No newline at end of file
+    return X, feature_cols
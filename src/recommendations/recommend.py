@@ -1,10 +1,25 @@
 # src/recommendations/recommend.py
 
-def run_recommendation_pipeline():
+MODELS_PATH = "models/recommendation_models.pkl"
+
+def run_recommendation_pipeline(backend="forest", n_jobs=-1, max_train_rows=None):
+    """
+    Bootstraps action/discount labels from risk scores, trains the action
+    classifier and discount regressor, and writes recommendations.
+
+    Args:
+        backend (str): "forest" (multi-core random forests) or "hist_gb"
+            (histogram gradient boosting).
+        n_jobs (int): Cores for the forest backend (-1 = all).
+        max_train_rows (int, optional): Cap on training rows; larger
+            inventories are subsampled (stratified by action).
+    """
     import os
+    import joblib
     import pandas as pd
     from .bootstrap_labels import add_bootstrap_labels
     from .features import prepare_features
+    from .relocation import plan_relocations, mark_relocation_sources, PLAN_PATH
     from .train_classifier import train_classifier
     from .train_regressor import train_regressor
 
@@ -16,6 +31,12 @@ def run_recommendation_pipeline():
     # Load data
     df = pd.read_csv(RISK_PATH, parse_dates=["Date_Received", "Last_Order_Date", "Expiration_Date"])
 
+    # Plan surplus transfers between locations; their sources are labelled Relocate
+    relocation_plan = plan_relocations(df)
+    relocation_plan.to_csv(PLAN_PATH, index=False)
+    df["Relocation_Source"] = mark_relocation_sources(df, relocation_plan)
+    print(f"🚚 Relocation plan: {len(relocation_plan)} moves → {PLAN_PATH}")
+
     # Bootstrap labels
     df = add_bootstrap_labels(df)
 
@@ -24,18 +45,31 @@ def run_recommendation_pipeline():
     y_action = df["Action"]
 
     # Train classifier
-    clf, le = train_classifier(X, y_action)
+    clf, le, classifier_metrics = train_classifier(
+        X, y_action, backend=backend, n_jobs=n_jobs, max_train_rows=max_train_rows
+    )
     df["Predicted_Action"] = le.inverse_transform(clf.predict(X))
 
     # Train regressor (only if discount)
-    df = train_regressor(df, feature_cols)
+    df, reg, regressor_metrics = train_regressor(
+        df, feature_cols, backend=backend, n_jobs=n_jobs, max_train_rows=max_train_rows
+    )
+
+    # Persist the fitted models so the scoring service can keep them warm
+    os.makedirs(os.path.dirname(MODELS_PATH), exist_ok=True)
+    joblib.dump(
+        {"classifier": clf, "label_encoder": le, "regressor": reg, "feature_cols": feature_cols,
+         "metrics": {"classifier": classifier_metrics, "regressor": regressor_metrics}},
+        MODELS_PATH
+    )
 
     # Save recommendations
     output_cols = [
-        "Product_ID", "Product_Name", "Category", "Supplier_Name",
-        "Stock_Quantity", "Risk_Level", "Predicted_Action", "Predicted_Discount_Percent"
+        "Product_ID", "Product_Name", "Category", "Supplier_Name", "Warehouse_Location",
+        "Stock_Quantity", "Stock_Value", "Risk_Level", "Risk_Probability",
+        "Predicted_Action", "Predicted_Discount_Percent"
     ]
-    df[output_cols].to_csv(OUTPUT_PATH, index=False)
+    df[[col for col in output_cols if col in df.columns]].to_csv(OUTPUT_PATH, index=False)
 
     print(f"✅ Recommendations complete. Results saved → {OUTPUT_PATH}")
     print("\nAction Distribution:")
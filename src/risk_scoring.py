@@ -1,23 +1,251 @@
 # src/risk_scoring.py
 
 import os
+import numpy as np
 import pandas as pd
 import joblib
+from scipy.special import ndtr
+
+# Upper bound on the demand index width; longer shelf lives are capped here
+MAX_HORIZON_DAYS = 1825
+
+# yhat_lower / yhat_upper are Prophet's default 80% interval → ±1.2816 sigma
+INTERVAL_Z = 1.2815515655446004
+
+# Probability of not selling through before expiry → Risk_Level. A row is
+# "High" when its stock exceeds the 90th percentile of demand until expiry,
+# "Medium" when it exceeds the median.
+RISK_PROBABILITY_LEVELS = [(0.9, "High"), (0.5, "Medium")]
+
+
+def load_latest_forecast(forecast_path):
+    """
+    Loads the combined forecast and keeps the last yhat per product.
+
+    Args:
+        forecast_path (str): Path to combined forecast CSV.
+
+    Returns:
+        pd.DataFrame: Product_Name and Forecasted_Demand columns.
+    """
+    forecast = pd.read_csv(forecast_path, parse_dates=["ds"])
+    latest_forecast = forecast.groupby("Product_Name")["yhat"].last().reset_index()
+    latest_forecast.rename(columns={"yhat": "Forecasted_Demand"}, inplace=True)
+    return latest_forecast
+
+
+class CumulativeDemandIndex:
+    """
+    Product × horizon matrix of cumulative forecast demand, built once from the
+    combined forecast. `cumulative[p, d]` is the expected demand for product p
+    over the `d` days starting at `as_of`, so "demand until this item expires"
+    is a single fancy-indexed lookup per row.
+    """
+
+    def __init__(self, products: pd.Index, cumulative: np.ndarray, as_of: pd.Timestamp):
+        self.products = products
+        self.cumulative = cumulative
+        self.as_of = as_of
+
+    @property
+    def horizon(self):
+        return self.cumulative.shape[1] - 1
+
+    @classmethod
+    def build(cls, forecast: pd.DataFrame, as_of=None, horizon=365, value_col="yhat"):
+        """
+        Args:
+            forecast (pd.DataFrame): Combined forecast (ds, Product_Name and value_col).
+            as_of (pd.Timestamp, optional): Day 0 of the index. Defaults to today.
+            horizon (int): Number of days covered; longer lookups are capped.
+            value_col (str): Forecast column to accumulate.
+
+        Returns:
+            CumulativeDemandIndex
+        """
+        as_of = pd.Timestamp(as_of if as_of is not None else "today").normalize()
+        horizon = max(int(horizon), 1)
+
+        forecast = forecast.dropna(subset=["ds", value_col]).sort_values("ds", kind="stable")
+        codes, products = pd.factorize(forecast["Product_Name"], sort=True)
+        offsets = (forecast["ds"].dt.normalize() - as_of).dt.days.to_numpy()
+        values = np.clip(forecast[value_col].to_numpy(dtype=float), 0, None)
+
+        daily = np.full((len(products), horizon), np.nan)
+        in_range = (offsets >= 0) & (offsets < horizon)
+        daily[codes[in_range], offsets[in_range]] = values[in_range]
+
+        # Rate in effect on day 0: the latest forecast on or before as_of, else
+        # the earliest one after it (forecast rows are sparse over the history)
+        on_or_before = pd.Series(values[offsets <= 0]).groupby(codes[offsets <= 0]).last()
+        earliest = pd.Series(values).groupby(codes).first()
+        seed = on_or_before.reindex(earliest.index).fillna(earliest).to_numpy()
+        daily[:, 0] = np.where(np.isnan(daily[:, 0]), seed, daily[:, 0])
+
+        # Forward-fill along the horizon: days without a forecast row (gaps and
+        # everything after the forecast ends) keep the last known daily rate
+        idx = np.where(~np.isnan(daily), np.arange(horizon), 0)
+        np.maximum.accumulate(idx, axis=1, out=idx)
+        daily = np.take_along_axis(daily, idx, axis=1)
+
+        cumulative = np.zeros((len(products), horizon + 1))
+        np.cumsum(daily, axis=1, out=cumulative[:, 1:])
+        return cls(pd.Index(products), cumulative, as_of)
+
+    def expected_demand(self, product_names, days_until_expiry, today=None):
+        """
+        Expected demand from `today` until each item expires.
+
+        Args:
+            product_names (array-like): Product_Name per row.
+            days_until_expiry (array-like): Days_Until_Expiry per row (relative to today).
+            today (pd.Timestamp, optional): Reference date of days_until_expiry.
+                Defaults to the index's as_of date.
+
+        Returns:
+            np.ndarray: Demand per row; NaN for products without a forecast
+                or without Days_Until_Expiry.
+        """
+        start = 0 if today is None else (pd.Timestamp(today).normalize() - self.as_of).days
+        start = min(max(start, 0), self.horizon)
+
+        rows = self.products.get_indexer(product_names)
+        if len(self.products) == 0:
+            return np.full(len(rows), np.nan)
+        days = pd.to_numeric(pd.Series(days_until_expiry), errors="coerce").to_numpy(dtype=float)
+        end = np.clip(start + np.nan_to_num(days), start, self.horizon).astype(np.int64)
+
+        demand = self.cumulative[rows, end] - self.cumulative[rows, start]
+        demand[rows < 0] = np.nan
+        # Unknown days to expiry is unknown demand, not a zero-day horizon
+        demand[np.isnan(days)] = np.nan
+        return demand
+
+
+def load_demand_index(forecast_path, as_of=None, horizon=365):
+    """
+    Loads the combined forecast and builds its CumulativeDemandIndex.
+
+    Args:
+        forecast_path (str): Path to combined forecast CSV.
+        as_of (pd.Timestamp, optional): Day 0 of the index. Defaults to today.
+        horizon (int): Number of days covered.
+
+    Returns:
+        CumulativeDemandIndex
+    """
+    forecast = pd.read_csv(forecast_path, parse_dates=["ds"])
+    return CumulativeDemandIndex.build(forecast, as_of=as_of, horizon=horizon)
+
+
+def sell_through_risk(df: pd.DataFrame, forecast: pd.DataFrame, as_of=None, horizon=365):
+    """
+    Probability that each item does not sell through before its Expiration_Date.
+
+    Demand until expiry is modelled per product as Normal(mean, sigma), where
+    the mean and sigma are cumulative forecast yhat and interval half-width
+    over the item's Days_Until_Expiry. The item is left unsold when demand <
+    stock, so the probability is Φ((stock - mean) / sigma) in closed form,
+    vectorized over all rows.
+
+    Args:
+        df (pd.DataFrame): Rows with Product_Name, Days_Until_Expiry and Stock_Quantity.
+        forecast (pd.DataFrame): Combined forecast with yhat, yhat_lower, yhat_upper.
+        as_of (pd.Timestamp, optional): Date Days_Until_Expiry is relative to.
+        horizon (int): Days covered by the demand index.
+
+    Returns:
+        np.ndarray: Risk_Probability per row (NaN for products without a
+            forecast or without Days_Until_Expiry).
+
+    Raises:
+        ValueError: If the forecast has no yhat_lower / yhat_upper columns.
+    """
+    if not {"yhat_lower", "yhat_upper"}.issubset(forecast.columns):
+        raise ValueError(
+            "❌ Probabilistic risk needs yhat_lower/yhat_upper in the forecast. "
+            "Re-run forecasting (python -m src.forecasting) to write the interval columns."
+        )
+    mean_index = CumulativeDemandIndex.build(forecast, as_of=as_of, horizon=horizon)
+    forecast = forecast.assign(
+        yhat_sigma=(forecast["yhat_upper"] - forecast["yhat_lower"]) / (2 * INTERVAL_Z)
+    )
+    # Forecast errors persist over the horizon, so daily sigmas add up
+    sigma_index = CumulativeDemandIndex.build(forecast, as_of=as_of, horizon=horizon, value_col="yhat_sigma")
+
+    names, days = df["Product_Name"], df["Days_Until_Expiry"]
+    mean = mean_index.expected_demand(names, days)
+    sigma = np.nan_to_num(sigma_index.expected_demand(names, days))
+    stock = pd.to_numeric(df["Stock_Quantity"], errors="coerce").to_numpy(dtype=float)
+
+    gap = stock - mean
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # A zero-width interval means demand is certain: unsold iff stock exceeds it
+        probability = np.where(sigma > 0, ndtr(gap / sigma), (gap > 0).astype(float))
+    # Demand is never negative, so nothing can be left unsold without stock
+    probability[~(stock > 0)] = 0.0
+    probability[np.isnan(mean)] = np.nan
+    return probability
+
+
+def assign_probability_risk_levels(df: pd.DataFrame) -> pd.Series:
+    """
+    Risk_Level from Risk_Probability using RISK_PROBABILITY_LEVELS.
+
+    Args:
+        df (pd.DataFrame): Rows with Expiry_Class and Risk_Probability.
+
+    Returns:
+        pd.Series: "Expired", "High", "Medium" or "Low" per row.
+    """
+    probability = df["Risk_Probability"].to_numpy()
+    conditions = [(df["Expiry_Class"] == "Expired").to_numpy()]
+    conditions += [probability >= threshold for threshold, _ in RISK_PROBABILITY_LEVELS]
+    choices = ["Expired"] + [level for _, level in RISK_PROBABILITY_LEVELS]
+    return pd.Series(np.select(conditions, choices, default="Low"), index=df.index)
+
+
+def assign_risk_levels(df: pd.DataFrame) -> pd.Series:
+    """
+    Vectorized Risk_Level assignment from Expiry_Class and Forecasted_Demand.
+
+    Args:
+        df (pd.DataFrame): Rows with Expiry_Class, Forecasted_Demand and Stock_Quantity.
+
+    Returns:
+        pd.Series: "Expired", "High" or "Low" per row.
+    """
+    demand = pd.to_numeric(df["Forecasted_Demand"], errors="coerce")
+    conditions = [
+        (df["Expiry_Class"] == "Expired").to_numpy(),
+        (demand.notna() & (demand < df["Stock_Quantity"])).to_numpy(),
+    ]
+    return pd.Series(np.select(conditions, ["Expired", "High"], default="Low"), index=df.index)
+
 
 def main(preprocessed_csv_path="data/processed/processed_data.csv",
          forecast_path="forecasts/product_level/all_products_forecast.csv",
          model_path="models/best_model.pkl",
          label_encoder_path="models/label_encoder.pkl",
-         output_path="data/external/risk_scores.csv"):
+         output_path="data/external/risk_scores.csv",
+         horizon_aware=True,
+         probabilistic=False):
     """
     Generates risk scores for inventory using expiry predictions and forecasted demand.
 
+    With horizon_aware=True, Forecasted_Demand is the expected demand from today
+    until each item's Expiration_Date (cumulative forecast over Days_Until_Expiry)
+    rather than the product's last single-day forecast.
+
     Args:
         preprocessed_csv_path (str): Path to preprocessed inventory CSV.
         forecast_path (str): Path to combined forecast CSV.
         model_path (str): Path to saved classifier for Expiry_Class prediction.
         label_encoder_path (str): Path to LabelEncoder for Expiry_Class.
         output_path (str): Path to save risk scores CSV.
+        horizon_aware (bool): Compare stock against demand until expiry.
+        probabilistic (bool): Add Risk_Probability (from the forecast intervals)
+            and derive Risk_Level from it. Requires yhat_lower/yhat_upper.
     """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
@@ -33,39 +261,35 @@ def main(preprocessed_csv_path="data/processed/processed_data.csv",
     # ✅ Predict Expiry_Class if not present
     if "Expiry_Class" not in df.columns:
         print("⚡ Expiry_Class not found in data → Using saved model for prediction")
-        X_features = [
-            "Category", "Shelf_Life", "Stock_Quantity", "Stock_Value",
-            "Sales_Volume", "Inventory_Turnover_Rate", "Unit_Price",
-            "Days_Until_Expiry", "Remaining_Shelf_Life_Ratio", "Stock_Age"
-        ]
-        X = pd.get_dummies(df[X_features], drop_first=True)
+        from src.modelling import predict_expiry_class
 
         # Load model & label encoder
         model = joblib.load(model_path)
         le = joblib.load(label_encoder_path)
 
-        df["Expiry_Class"] = le.inverse_transform(model.predict(X))
+        # Same training column layout as the scoring paths
+        df["Expiry_Class"] = predict_expiry_class(df, model, le)
 
     # ✅ Load forecasted demand
-    if os.path.exists(forecast_path):
+    max_days = pd.to_numeric(df["Days_Until_Expiry"], errors="coerce").max()
+    horizon = int(np.clip(np.nan_to_num(max_days, nan=1), 1, MAX_HORIZON_DAYS))
+    if os.path.exists(forecast_path) and (horizon_aware or probabilistic):
         forecast = pd.read_csv(forecast_path, parse_dates=["ds"])
-        latest_forecast = forecast.groupby("Product_Name")["yhat"].last().reset_index()
-        latest_forecast.rename(columns={"yhat": "Forecasted_Demand"}, inplace=True)
+        demand_index = CumulativeDemandIndex.build(forecast, horizon=horizon)
+        df["Forecasted_Demand"] = demand_index.expected_demand(df["Product_Name"], df["Days_Until_Expiry"])
+    elif os.path.exists(forecast_path):
+        latest_forecast = load_latest_forecast(forecast_path)
         df = df.merge(latest_forecast, on="Product_Name", how="left")
     else:
         print(f"⚠️ Forecast file not found: {forecast_path}. Forecasted_Demand will be empty.")
         df["Forecasted_Demand"] = pd.NA
 
     # ✅ Assign Risk_Level
-    def assign_risk(row):
-        if row["Expiry_Class"] == "Expired":
-            return "Expired"
-        elif pd.notna(row["Forecasted_Demand"]) and row["Forecasted_Demand"] < row["Stock_Quantity"]:
-            return "High"
-        else:
-            return "Low"
-
-    df["Risk_Level"] = df.apply(assign_risk, axis=1)
+    if probabilistic and os.path.exists(forecast_path):
+        df["Risk_Probability"] = sell_through_risk(df, forecast, horizon=horizon)
+        df["Risk_Level"] = assign_probability_risk_levels(df)
+    else:
+        df["Risk_Level"] = assign_risk_levels(df)
 
     # ✅ Save risk scores
     df.to_csv(output_path, index=False)
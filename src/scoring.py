@@ -0,0 +1,219 @@
+# src/scoring.py
+
+import os
+import numpy as np
+import pandas as pd
+import joblib
+
+from src.data_preprocessing import clean_raw_data, add_derived_features, robust_datetime_convert
+from src.modelling import MODEL_PATH, ENCODER_PATH, expiry_feature_encoder, predict_expiry_class
+from src.risk_scoring import load_demand_index, assign_risk_levels, MAX_HORIZON_DAYS
+from src.recommendations.features import prepare_features
+from src.recommendations.recommend import MODELS_PATH as RECOMMENDATION_MODELS_PATH
+from src.tree_compiler import compile_model
+
+FORECAST_PATH = "forecasts/product_level/all_products_forecast.csv"
+
+# JSON clients may send numbers as strings; these are coerced before scoring
+NUMERIC_COLUMNS = [
+    "Stock_Quantity", "Reorder_Level", "Reorder_Quantity", "Sales_Volume",
+    "Inventory_Turnover_Rate"
+]
+
+# Batches up to this size use the compiled tree evaluator (much lower per-call
+# overhead); sklearn's own predict is faster on larger batches
+COMPILED_MAX_ROWS = 256
+
+# Raw input columns every scored row needs (checked up front so a bad request
+# fails with a clear ValueError rather than a KeyError deep in a model step)
+REQUIRED_COLUMNS = [
+    "Product_Name", "Category", "Stock_Quantity", "Reorder_Level", "Reorder_Quantity",
+    "Unit_Price", "Sales_Volume", "Inventory_Turnover_Rate",
+    "Date_Received", "Expiration_Date", "Last_Order_Date"
+]
+
+# Dates every derived feature depends on; a row where one is missing or does
+# not parse cannot be scored meaningfully and is rejected
+SCORED_DATE_COLUMNS = ["Date_Received", "Expiration_Date"]
+
+OUTPUT_COLUMNS = [
+    "Product_ID", "Product_Name", "Warehouse_Location", "Days_Until_Expiry",
+    "Stock_Value", "Expiry_Class", "Forecasted_Demand", "Risk_Level",
+    "Predicted_Action", "Predicted_Discount_Percent"
+]
+
+
+class ScoringModels:
+    """
+    Keeps every model the pipeline needs in memory and scores raw inventory
+    rows end to end (preprocessing → expiry class → forecast lookup → risk →
+    action/discount) with one vectorized call per step.
+    """
+
+    def __init__(self, expiry_model, expiry_encoder, demand_index,
+                 action_classifier, action_encoder, discount_regressor):
+        self.expiry_model = expiry_model
+        self.expiry_encoder = expiry_encoder
+        self.demand_index = demand_index
+        self.action_classifier = action_classifier
+        self.action_encoder = action_encoder
+        self.discount_regressor = discount_regressor
+
+        self.compiled_expiry = _compile_or_none(expiry_model, "Expiry_Class model")
+        self.compiled_action = _compile_or_none(action_classifier, "action classifier")
+        self.compiled_discount = (
+            _compile_or_none(discount_regressor, "discount regressor") if discount_regressor is not None else None
+        )
+        # One encoder for the compiled and the sklearn path, so a row is encoded
+        # the same way whatever the batch size
+        self.expiry_features = expiry_feature_encoder(expiry_model)
+
+    @classmethod
+    def load(cls, model_path=MODEL_PATH, label_encoder_path=ENCODER_PATH,
+             forecast_path=FORECAST_PATH,
+             recommendation_models_path=RECOMMENDATION_MODELS_PATH):
+        """
+        Loads all artifacts once.
+
+        Args:
+            model_path (str): Path to saved Expiry_Class classifier.
+            label_encoder_path (str): Path to LabelEncoder for Expiry_Class.
+            forecast_path (str): Path to combined forecast CSV.
+            recommendation_models_path (str): Path to the action/discount models
+                written by run_recommendation_pipeline.
+
+        Returns:
+            ScoringModels: Warm model bundle.
+        """
+        for path in (model_path, label_encoder_path, recommendation_models_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(
+                    f"❌ {path} not found! Run run_pipeline.py once to generate the models."
+                )
+
+        if os.path.exists(forecast_path):
+            demand_index = load_demand_index(forecast_path, horizon=MAX_HORIZON_DAYS)
+        else:
+            print(f"⚠️ Forecast file not found: {forecast_path}. Forecasted_Demand will be empty.")
+            demand_index = None
+
+        recommendation_models = joblib.load(recommendation_models_path)
+
+        print("✅ Scoring models loaded")
+        return cls(
+            expiry_model=joblib.load(model_path),
+            expiry_encoder=joblib.load(label_encoder_path),
+            demand_index=demand_index,
+            action_classifier=recommendation_models["classifier"],
+            action_encoder=recommendation_models["label_encoder"],
+            discount_regressor=recommendation_models["regressor"],
+        )
+
+    def score(self, raw_df: pd.DataFrame, today=None) -> pd.DataFrame:
+        """
+        Scores raw inventory rows.
+
+        Args:
+            raw_df (pd.DataFrame): Rows in the uploaded inventory schema.
+            today (pd.Timestamp, optional): Reference date. Defaults to today.
+
+        Returns:
+            pd.DataFrame: One row per input row, in input order.
+        """
+        _check_columns(raw_df)
+        df = clean_raw_data(raw_df.reset_index(drop=True))
+        _check_dates(df)
+        for col in NUMERIC_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+        df = add_derived_features(df, today=today)
+        df = self.score_processed(df, today=today)
+        return df
+
+    def score_processed(self, df: pd.DataFrame, today=None) -> pd.DataFrame:
+        """
+        Runs the model steps on already preprocessed rows.
+
+        Args:
+            df (pd.DataFrame): Rows with the derived feature columns.
+            today (pd.Timestamp, optional): Date Days_Until_Expiry is relative to.
+                Defaults to today.
+
+        Returns:
+            pd.DataFrame: The same frame with prediction columns added.
+        """
+        small = len(df) <= COMPILED_MAX_ROWS
+        if small and self.compiled_expiry is not None:
+            expiry_encoded = self.compiled_expiry.predict(self.expiry_features.encode(df))
+            df["Expiry_Class"] = self.expiry_encoder.inverse_transform(expiry_encoded)
+        else:
+            df["Expiry_Class"] = predict_expiry_class(
+                df, self.expiry_model, self.expiry_encoder, features=self.expiry_features
+            )
+        if self.demand_index is not None:
+            df["Forecasted_Demand"] = self.demand_index.expected_demand(
+                df["Product_Name"], df["Days_Until_Expiry"], pd.Timestamp(today or "today")
+            )
+        else:
+            df["Forecasted_Demand"] = np.nan
+        df["Risk_Level"] = assign_risk_levels(df)
+
+        X, _ = prepare_features(df)
+        df["Predicted_Action"] = self.action_encoder.inverse_transform(
+            _predict(self.action_classifier, self.compiled_action, X)
+        )
+
+        df["Predicted_Discount_Percent"] = np.nan
+        discount_mask = (df["Predicted_Action"] == "Discount").to_numpy()
+        if self.discount_regressor is not None and discount_mask.any():
+            df.loc[discount_mask, "Predicted_Discount_Percent"] = _predict(
+                self.discount_regressor, self.compiled_discount, X[discount_mask]
+            )
+        return df
+
+
+def validate_rows(raw_df: pd.DataFrame):
+    """
+    Checks raw rows up front, so a bad request can be rejected on its own
+    before it is batched with others.
+
+    Args:
+        raw_df (pd.DataFrame): Rows in the uploaded inventory schema.
+
+    Raises:
+        ValueError: If a required column is missing, or a Date_Received /
+            Expiration_Date is missing or does not parse.
+    """
+    _check_columns(raw_df)
+    _check_dates(pd.DataFrame({
+        col: raw_df[col] if pd.api.types.is_datetime64_any_dtype(raw_df[col]) else robust_datetime_convert(raw_df[col])
+        for col in SCORED_DATE_COLUMNS
+    }))
+
+
+def _check_columns(df):
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+
+def _check_dates(df):
+    for col in SCORED_DATE_COLUMNS:
+        bad = np.flatnonzero(df[col].isna().to_numpy())
+        if len(bad):
+            rows = ", ".join(str(i) for i in bad[:5]) + (" ..." if len(bad) > 5 else "")
+            raise ValueError(f"Missing or unparseable {col} in row(s) {rows}")
+
+
+def _compile_or_none(model, label):
+    try:
+        return compile_model(model)
+    except TypeError as e:
+        print(f"⚠️ {label} not compiled ({e}); using sklearn predict")
+        return None
+
+
+def _predict(model, compiled, X: pd.DataFrame):
+    if compiled is not None and len(X) <= COMPILED_MAX_ROWS:
+        return compiled.predict(X.to_numpy(dtype=np.float64, na_value=np.nan))
+    return model.predict(X)
@@ -0,0 +1,209 @@
+# src/scoring_service.py
+
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from src.scoring import ScoringModels, OUTPUT_COLUMNS, REQUIRED_COLUMNS, validate_rows
+
+
+class MicroBatcher:
+    """
+    Collects concurrent scoring requests and scores them together.
+
+    The worker thread blocks for the first request, then keeps draining the
+    queue until `max_batch_rows` rows are collected or `max_wait_ms` has
+    passed, and runs the whole batch through one vectorized `score_fn` call.
+    """
+
+    def __init__(self, score_fn, max_batch_rows=512, max_wait_ms=5.0):
+        self.score_fn = score_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, records):
+        """
+        Queues a list of row dicts.
+
+        Returns:
+            Future: Resolves to a DataFrame with one scored row per record.
+        """
+        future = Future()
+        self._queue.put((records, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            n_rows = len(item[0])
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while n_rows < self.max_batch_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                n_rows += len(item[0])
+
+            self._score_batch(batch)
+            if stop:
+                return
+
+    def _score_batch(self, batch):
+        records = [record for request_records, _ in batch for record in request_records]
+        try:
+            scored = self.score_fn(pd.DataFrame.from_records(records))
+        except Exception:
+            # One malformed request must not fail everyone else in the batch
+            for request_records, future in batch:
+                try:
+                    future.set_result(self.score_fn(pd.DataFrame.from_records(request_records)))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for request_records, future in batch:
+            n = len(request_records)
+            future.set_result(scored.iloc[offset:offset + n])
+            offset += n
+
+
+def _to_records(df: pd.DataFrame):
+    cols = [col for col in OUTPUT_COLUMNS if col in df.columns]
+    out = df[cols].astype(object).where(df[cols].notna(), None)
+    return out.to_dict(orient="records")
+
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    # socketserver's default listen backlog of 5 resets connections when many
+    # POS/WMS clients connect at once
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_handler(batcher, timeout=10.0):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            else:
+                self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"null")
+            except ValueError as e:
+                self._send_json(400, {"error": f"Invalid JSON: {e}"})
+                return
+
+            # Accept a single row, a list of rows, or {"rows": [...]}
+            if isinstance(payload, dict):
+                records = payload.get("rows", [payload])
+            else:
+                records = payload
+            if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+                self._send_json(400, {"error": "Expected a JSON object or a non-empty list of objects"})
+                return
+
+            # Checked per request: in a shared batch a missing key would just become
+            # NaN, and one bad date would fail the whole batch
+            missing = [col for col in REQUIRED_COLUMNS if any(col not in r for r in records)]
+            if missing:
+                self._send_json(400, {"error": f"Missing required columns: {', '.join(missing)}"})
+                return
+            try:
+                validate_rows(pd.DataFrame.from_records(records))
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+
+            try:
+                scored = batcher.submit(records).result(timeout=timeout)
+            except (ValueError, KeyError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+
+            self._send_json(200, {"results": _to_records(scored)})
+
+        def log_message(self, format, *args):
+            # Keep the hot path quiet; request logging costs more than scoring a row
+            pass
+
+    return ScoringHandler
+
+
+def serve(host="127.0.0.1", port=8000, max_batch_rows=512, max_wait_ms=5.0):
+    """
+    Starts the scoring service with all models loaded once.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind.
+        max_batch_rows (int): Upper bound on rows scored in one batch.
+        max_wait_ms (float): How long the batcher waits for more requests.
+    """
+    models = ScoringModels.load()
+    batcher = MicroBatcher(models.score, max_batch_rows=max_batch_rows, max_wait_ms=max_wait_ms)
+    server = ScoringHTTPServer((host, port), make_handler(batcher))
+
+    print(f"🚀 Scoring service listening on http://{host}:{port} (POST /score, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-rows", type=int, default=512)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.max_batch_rows, args.max_wait_ms)
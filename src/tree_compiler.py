@@ -0,0 +1,408 @@
+# src/tree_compiler.py
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+import joblib
+
+from sklearn.ensemble import (
+    RandomForestClassifier, RandomForestRegressor, ExtraTreesClassifier, ExtraTreesRegressor,
+    GradientBoostingClassifier, GradientBoostingRegressor,
+    HistGradientBoostingClassifier, HistGradientBoostingRegressor
+)
+from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+
+
+class CompiledEnsemble:
+    """
+    A tree ensemble flattened into NumPy arrays (feature, threshold, children,
+    missing-value direction, leaf values), evaluated level by level for all
+    rows and trees at once. Leaves point back to themselves, so every row
+    just takes `max_depth` vectorized steps.
+
+    Raw output = base + scale * (sum or mean of the leaf values over trees),
+    per output column (class or target). With `tree_output`, each tree has a
+    single leaf value that adds to its own output only (gradient boosting
+    builds one tree per class and iteration).
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots,
+                 tree_output, n_outputs, max_depth, n_features, kind, classes=None,
+                 base=0.0, scale=1.0, average=False, float32_inputs=True):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.tree_output = tree_output
+        self.n_outputs = n_outputs
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.kind = kind
+        self.classes = classes
+        self.base = base
+        self.scale = scale
+        self.average = average
+        self.float32_inputs = float32_inputs
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Leaf node index per row and tree.
+
+        Args:
+            X (np.ndarray): (n_rows, n_features) features in model column order.
+
+        Returns:
+            np.ndarray: (n_rows, n_trees) global node indices.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if self.float32_inputs:
+            # sklearn's DecisionTree compares float32 inputs against float64 thresholds
+            X = X.astype(np.float32).astype(np.float64)
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            go_left = (x <= self.threshold[nodes]) | (np.isnan(x) & self.missing_left[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Raw ensemble output: (n_rows, n_outputs)."""
+        leaves = self.apply(X)
+        if self.tree_output is None:
+            raw = self.value[leaves].sum(axis=1)
+        else:
+            raw = np.zeros((leaves.shape[0], self.n_outputs))
+            for output in range(self.n_outputs):
+                trees = self.tree_output == output
+                raw[:, output] = self.value[leaves[:, trees], 0].sum(axis=1)
+        if self.average:
+            raw /= len(self.roots)
+        return self.base + self.scale * raw
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        raw = self.decision_function(X)
+        if self.kind == "forest_classifier":
+            return raw
+        if raw.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        raw = np.exp(raw - raw.max(axis=1, keepdims=True))
+        return raw / raw.sum(axis=1, keepdims=True)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Same output as the sklearn model's predict (class labels or values)."""
+        if self.classes is None:
+            return self.decision_function(X)[:, 0]
+        raw = self.decision_function(X)
+        if raw.shape[1] == 1:
+            # Binary boosting: one raw score, positive class when it is > 0
+            return self.classes[(raw[:, 0] > 0).astype(int)]
+        return self.classes[np.argmax(raw, axis=1)]
+
+
+def _final_estimator(model):
+    """Unwraps (imblearn) pipelines whose other steps are samplers only."""
+    if hasattr(model, "steps"):
+        for name, step in model.steps[:-1]:
+            if step not in (None, "passthrough") and not hasattr(step, "fit_resample"):
+                raise TypeError(f"Pipeline step '{name}' transforms the features; only samplers can be compiled")
+        return _final_estimator(model.steps[-1][1])
+    return model
+
+
+def _sklearn_trees(trees, normalize):
+    """Concatenates sklearn Tree objects into global node arrays."""
+    parts, roots, depth, offset = [], [], 0, 0
+    for tree in trees:
+        t = tree.tree_
+        leaf = t.children_left == -1
+        ids = np.arange(t.node_count) + offset
+        value = t.value[:, 0, :].astype(np.float64)
+        if normalize:
+            value = value / value.sum(axis=1, keepdims=True)
+        missing = getattr(t, "missing_go_to_left", np.zeros(t.node_count, dtype=np.uint8)).astype(bool)
+        parts.append((
+            np.where(leaf, 0, t.feature),
+            np.where(leaf, np.inf, t.threshold),
+            np.where(leaf, ids, t.children_left + offset),
+            np.where(leaf, ids, t.children_right + offset),
+            missing | leaf,
+            value,
+        ))
+        roots.append(offset)
+        depth = max(depth, t.max_depth)
+        offset += t.node_count
+    arrays = [np.concatenate(col) for col in zip(*parts)]
+    return arrays, np.asarray(roots, dtype=np.int64), depth
+
+
+def _hist_trees(predictors):
+    """Concatenates HistGradientBoosting TreePredictor node records."""
+    parts, roots, depth, offset = [], [], 0, 0
+    for predictor in predictors:
+        nodes = predictor.nodes
+        if nodes["is_categorical"].any():
+            raise TypeError("Categorical splits are not supported by the tree compiler")
+        leaf = nodes["is_leaf"].astype(bool)
+        ids = np.arange(len(nodes)) + offset
+        parts.append((
+            np.where(leaf, 0, nodes["feature_idx"]),
+            np.where(leaf, np.inf, nodes["num_threshold"]),
+            np.where(leaf, ids, nodes["left"].astype(np.int64) + offset),
+            np.where(leaf, ids, nodes["right"].astype(np.int64) + offset),
+            nodes["missing_go_to_left"].astype(bool) | leaf,
+            nodes["value"].astype(np.float64)[:, None],
+        ))
+        roots.append(offset)
+        depth = max(depth, int(nodes["depth"].max()))
+        offset += len(nodes)
+    arrays = [np.concatenate(col) for col in zip(*parts)]
+    return arrays, np.asarray(roots, dtype=np.int64), depth
+
+
+def compile_model(model) -> CompiledEnsemble:
+    """
+    Flattens a fitted tree model into a CompiledEnsemble.
+
+    Supported: DecisionTree, RandomForest / ExtraTrees, GradientBoosting and
+    HistGradientBoosting (numeric splits) classifiers and regressors, also
+    inside pipelines whose other steps are samplers (e.g. SMOTE).
+
+    Args:
+        model: Fitted sklearn / imblearn estimator.
+
+    Returns:
+        CompiledEnsemble: Array form of the model.
+
+    Raises:
+        TypeError: If the model (or a part of it) cannot be compiled.
+    """
+    est = _final_estimator(model)
+    n_features = est.n_features_in_
+
+    if isinstance(est, (DecisionTreeClassifier, DecisionTreeRegressor,
+                        RandomForestClassifier, RandomForestRegressor,
+                        ExtraTreesClassifier, ExtraTreesRegressor)):
+        is_classifier = hasattr(est, "classes_")
+        if is_classifier and est.n_outputs_ != 1:
+            raise TypeError("Multi-output classifiers are not supported by the tree compiler")
+        trees = est.estimators_ if hasattr(est, "estimators_") else [est]
+        arrays, roots, depth = _sklearn_trees(trees, normalize=is_classifier)
+        return CompiledEnsemble(
+            *arrays, roots=roots, tree_output=None, n_outputs=arrays[-1].shape[1], max_depth=depth, n_features=n_features,
+            kind="forest_classifier" if is_classifier else "forest_regressor",
+            classes=est.classes_ if is_classifier else None, average=True,
+        )
+
+    if isinstance(est, (GradientBoostingClassifier, GradientBoostingRegressor)):
+        if est.init_ != "zero" and type(est.init_).__name__ not in ("DummyClassifier", "DummyRegressor"):
+            raise TypeError("Only the default (prior) or 'zero' init estimator can be compiled")
+        n_iter, n_outputs = est.estimators_.shape
+        arrays, roots, depth = _sklearn_trees(est.estimators_.ravel(), normalize=False)
+        # The init estimator's raw prediction does not depend on X
+        base = est._raw_predict_init(np.zeros((1, n_features)))[0]
+        return CompiledEnsemble(
+            *arrays, roots=roots, tree_output=np.tile(np.arange(n_outputs), n_iter),
+            n_outputs=n_outputs, max_depth=depth, n_features=n_features,
+            kind="boosting_classifier" if hasattr(est, "classes_") else "boosting_regressor",
+            classes=getattr(est, "classes_", None), base=base, scale=est.learning_rate,
+        )
+
+    if isinstance(est, (HistGradientBoostingClassifier, HistGradientBoostingRegressor)):
+        if getattr(est, "_preprocessor", None) is not None:
+            raise TypeError("Categorical features are not supported by the tree compiler")
+        predictors = [p for iteration in est._predictors for p in iteration]
+        n_outputs = len(est._predictors[0])
+        arrays, roots, depth = _hist_trees(predictors)
+        return CompiledEnsemble(
+            *arrays, roots=roots, tree_output=np.tile(np.arange(n_outputs), len(est._predictors)),
+            n_outputs=n_outputs, max_depth=depth, n_features=n_features,
+            kind="boosting_classifier" if hasattr(est, "classes_") else "boosting_regressor",
+            classes=getattr(est, "classes_", None),
+            base=np.asarray(est._baseline_prediction, dtype=np.float64).ravel(),
+            float32_inputs=False,
+        )
+
+    raise TypeError(f"{type(est).__name__} cannot be compiled (tree ensembles only)")
+
+
+class FeatureEncoder:
+    """
+    Writes DataFrame rows straight into a preallocated float array in the
+    model's column order. Columns like "Category_Dairy" that are not in the
+    frame are one-hot indicators of a source column ("Category" == "Dairy");
+    any other missing column is 0, as with reindex(fill_value=0).
+    """
+
+    def __init__(self, feature_names, source_columns=None, capacity=1024, fill_value=None):
+        self.feature_names = list(feature_names)
+        self.fill_value = fill_value
+        self.buffer = np.zeros((capacity, len(self.feature_names)))
+        self.numeric, self.indicators = [], []
+        source_columns = list(source_columns or self.feature_names)
+        for j, name in enumerate(self.feature_names):
+            if name in source_columns:
+                self.numeric.append((j, name))
+                continue
+            for column in source_columns:
+                if name.startswith(column + "_"):
+                    self.indicators.append((j, column, name[len(column) + 1:]))
+                    break
+
+    def encode(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Args:
+            df (pd.DataFrame): Rows with the source columns.
+
+        Returns:
+            np.ndarray: View of the buffer, (len(df), n_features).
+        """
+        n = len(df)
+        if n > len(self.buffer):
+            self.buffer = np.zeros((max(n, 2 * len(self.buffer)), len(self.feature_names)))
+        X = self.buffer[:n]
+        X.fill(0.0)
+        for j, column in self.numeric:
+            X[:, j] = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        for j, column, level in self.indicators:
+            X[:, j] = (df[column].astype(str) == level).to_numpy()
+        if self.fill_value is not None:
+            np.nan_to_num(X, copy=False, nan=self.fill_value)
+        return X
+
+
+def check_parity(model, compiled, X, atol=1e-9):
+    """
+    Compares compiled predictions (and raw scores / probabilities) against
+    sklearn's on the same rows.
+
+    Returns:
+        dict: mismatches (differing predictions) and max_abs_diff of the
+            probabilities (classifiers) or predictions (regressors).
+    """
+    frame = pd.DataFrame(X, columns=getattr(model, "feature_names_in_", None))
+    expected = np.asarray(model.predict(frame))
+    actual = compiled.predict(X)
+    if compiled.classes is None:
+        diff = float(np.max(np.abs(expected - actual), initial=0.0))
+        mismatches = int((np.abs(expected - actual) > atol).sum())
+    else:
+        diff = float(np.max(np.abs(model.predict_proba(frame) - compiled.predict_proba(X)), initial=0.0))
+        mismatches = int((expected != actual).sum())
+    return {"rows": len(X), "mismatches": mismatches, "max_abs_diff": diff}
+
+
+def benchmark_latency(model, compiled, X, batch_sizes=(1, 10, 1000), repeats=200):
+    """
+    Per-call and per-row latency of sklearn's predict vs. the compiled
+    evaluator, for a few batch sizes.
+    """
+    results = []
+    for batch in batch_sizes:
+        rows = X[np.arange(batch) % len(X)]
+        frame = pd.DataFrame(rows, columns=getattr(model, "feature_names_in_", None))
+        n = max(repeats // batch, 5) if batch > 1 else repeats
+        timings = {}
+        for name, predict in (("sklearn", lambda: model.predict(frame)), ("compiled", lambda: compiled.predict(rows))):
+            predict()
+            start = time.perf_counter()
+            for _ in range(n):
+                predict()
+            timings[name] = (time.perf_counter() - start) / n
+        results.append({"batch": batch, **{f"{k}_ms": v * 1000 for k, v in timings.items()},
+                        "speedup": timings["sklearn"] / timings["compiled"]})
+        print(f"   batch {batch:5d}: sklearn {timings['sklearn'] * 1000:8.3f} ms, compiled "
+              f"{timings['compiled'] * 1000:8.3f} ms per call ({timings['sklearn'] / timings['compiled']:.1f}x)")
+    return results
+
+
+def _load_or_none(path):
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        # e.g. pickled with another scikit-learn version (ModuleNotFoundError: _loss)
+        print(f"⚠️ Could not load {path} ({type(e).__name__}: {e}); retrain it with the installed scikit-learn")
+        return None
+
+
+def _saved_models(model_path, recommendation_models_path):
+    models = {}
+    if os.path.exists(model_path):
+        expiry_model = _load_or_none(model_path)
+        if expiry_model is not None:
+            models["Expiry_Class model"] = expiry_model
+    if os.path.exists(recommendation_models_path):
+        bundle = _load_or_none(recommendation_models_path)
+        if bundle is not None:
+            models["Action classifier"] = bundle["classifier"]
+            if bundle["regressor"] is not None:
+                models["Discount regressor"] = bundle["regressor"]
+    return models
+
+
+def _sample_rows(model, n_rows, seed=42):
+    """
+    Rows spanning every split threshold of the model, plus some NaNs when the
+    model accepts missing values.
+    """
+    compiled = compile_model(model)
+    rng = np.random.default_rng(seed)
+    X = np.empty((n_rows, compiled.n_features))
+    internal = np.isfinite(compiled.threshold)
+    for j in range(compiled.n_features):
+        thresholds = compiled.threshold[internal & (compiled.feature == j)]
+        if len(thresholds):
+            lo, hi = thresholds.min(), thresholds.max()
+            span = max(hi - lo, 1.0)
+            X[:, j] = rng.uniform(lo - 0.1 * span, hi + 0.1 * span, n_rows)
+            # Exact threshold values exercise the <= boundary
+            exact = rng.random(n_rows) < 0.1
+            X[exact, j] = rng.choice(thresholds, exact.sum())
+        else:
+            X[:, j] = rng.integers(0, 2, n_rows)
+    # Missing values exercise each node's NaN routing (missing_go_to_left)
+    try:
+        allow_nan = model.__sklearn_tags__().input_tags.allow_nan
+    except AttributeError:
+        allow_nan = False
+    if allow_nan:
+        X[rng.random(X.shape) < 0.05] = np.nan
+    return X
+
+
+if __name__ == "__main__":
+    from src.modelling import MODEL_PATH
+    from src.recommendations.recommend import MODELS_PATH
+
+    parser = argparse.ArgumentParser(description="Compile saved tree models to arrays; check parity and latency")
+    parser.add_argument("--rows", type=int, default=5000, help="Synthetic rows for the parity check")
+    parser.add_argument("--benchmark", action="store_true", help="Also measure per-call latency")
+    args = parser.parse_args()
+
+    saved = _saved_models(MODEL_PATH, MODELS_PATH)
+    if not saved:
+        print("⚠️ No loadable saved models found. Run run_pipeline.py first.")
+    for label, fitted in saved.items():
+        try:
+            compiled_model = compile_model(fitted)
+        except TypeError as e:
+            print(f"⚠️ {label}: {e}")
+            continue
+        sample = _sample_rows(fitted, args.rows)
+        parity = check_parity(fitted, compiled_model, sample)
+        status = "✅" if parity["mismatches"] == 0 else "❌"
+        print(f"{status} {label}: {len(compiled_model.roots)} trees, {compiled_model.n_nodes} nodes, "
+              f"{parity['mismatches']}/{parity['rows']} mismatches, max |diff| {parity['max_abs_diff']:.2e}")
+        if args.benchmark:
+            benchmark_latency(fitted, compiled_model, sample)
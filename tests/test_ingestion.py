@@ -0,0 +1,41 @@
+# tests/test_ingestion.py
+
+import pandas as pd
+import pytest
+
+from src.data_preprocessing import clean_raw_data, add_derived_features
+from src.ingestion import read_inventory_csv
+
+HEADER = (
+    "Product_ID,Product_Name,Category,Supplier_ID,Supplier_Name,Stock_Quantity,Reorder_Level,"
+    "Reorder_Quantity,Unit_Price,Date_Received,Last_Order_Date,Expiration_Date,Warehouse_Location,"
+    "Sales_Volume,Inventory_Turnover_Rate,Status,Expiry_Class"
+)
+GOOD_ROW = (
+    "40-003-7322,White Sugar,Grains & Pulses,41-644-3129,Wordtune,13,32,79,$2.00 ,07-05-2024,"
+    "2025-02-16,29-10-2025,2693 6th Court,38,61.0,Discontinued,Not_Expired"
+)
+BAD_DATE_ROW = (
+    "22-083-3347,Long Grain Rice,Grains & Pulses,01-431-7544,Yodoo,69,82,58,$1.50 ,07-07-2024,"
+    "29-04-2024,not a date,38 Superior Road,34,22,Discontinued,Expired"
+)
+
+
+def test_typed_upload():
+    df = read_inventory_csv(f"{HEADER}\n{GOOD_ROW}\n".encode())
+
+    assert pd.api.types.is_datetime64_any_dtype(df["Expiration_Date"])
+    assert df.loc[0, "Expiration_Date"] == pd.Timestamp("2025-10-29")
+
+
+def test_bad_date_upload_keeps_numeric_columns():
+    with pytest.warns(UserWarning, match="Typed CSV parse failed"):
+        df = read_inventory_csv(f"{HEADER}\n{GOOD_ROW}\n{BAD_DATE_ROW}\n".encode())
+
+    for col in ["Stock_Quantity", "Reorder_Level", "Sales_Volume", "Inventory_Turnover_Rate"]:
+        assert pd.api.types.is_numeric_dtype(df[col]), col
+
+    df = add_derived_features(clean_raw_data(df), today=pd.Timestamp("2025-01-01"))
+    assert df["Expiration_Date"].tolist()[0] == pd.Timestamp("2025-10-29")
+    assert pd.isna(df.loc[1, "Expiration_Date"])
+    assert df["Stock_Value"].tolist() == pytest.approx([26.0, 103.5])
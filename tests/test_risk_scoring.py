@@ -0,0 +1,44 @@
+# tests/test_risk_scoring.py
+
+import numpy as np
+import pandas as pd
+
+from src.risk_scoring import CumulativeDemandIndex, assign_risk_levels, sell_through_risk
+
+AS_OF = pd.Timestamp("2025-01-01")
+
+
+def make_forecast():
+    ds = pd.date_range(AS_OF, periods=30)
+    forecast = pd.DataFrame({"ds": ds, "yhat": 10.0, "Product_Name": "Milk"})
+    forecast["yhat_lower"] = forecast["yhat"] - 2
+    forecast["yhat_upper"] = forecast["yhat"] + 2
+    return forecast
+
+
+def test_expected_demand_until_expiry():
+    index = CumulativeDemandIndex.build(make_forecast(), as_of=AS_OF, horizon=30)
+
+    demand = index.expected_demand(["Milk", "Milk", "Bread"], [3, 0, 3])
+    assert demand[:2].tolist() == [30.0, 0.0]
+    assert np.isnan(demand[2])
+
+
+def test_unknown_days_until_expiry_is_not_high_risk():
+    forecast = make_forecast()
+    df = pd.DataFrame({
+        "Product_Name": ["Milk", "Milk"],
+        "Days_Until_Expiry": [5, np.nan],
+        "Stock_Quantity": [100, 100],
+        "Expiry_Class": ["Not_Expired", "Not_Expired"],
+    })
+    index = CumulativeDemandIndex.build(forecast, as_of=AS_OF, horizon=30)
+
+    df["Forecasted_Demand"] = index.expected_demand(df["Product_Name"], df["Days_Until_Expiry"])
+    assert df.loc[0, "Forecasted_Demand"] == 50.0
+    assert np.isnan(df.loc[1, "Forecasted_Demand"])
+    assert assign_risk_levels(df).tolist() == ["High", "Low"]
+
+    probability = sell_through_risk(df, forecast, as_of=AS_OF, horizon=30)
+    assert probability[0] > 0.99
+    assert np.isnan(probability[1])
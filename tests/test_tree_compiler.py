@@ -0,0 +1,74 @@
+# tests/test_tree_compiler.py
+
+import numpy as np
+import pytest
+from imblearn.over_sampling import SMOTE
+from imblearn.pipeline import Pipeline
+from sklearn.datasets import make_classification, make_regression
+from sklearn.ensemble import (
+    ExtraTreesClassifier, ExtraTreesRegressor, GradientBoostingClassifier, GradientBoostingRegressor,
+    HistGradientBoostingClassifier, HistGradientBoostingRegressor, RandomForestClassifier,
+    RandomForestRegressor
+)
+
+from src.tree_compiler import check_parity, compile_model, _sample_rows
+
+
+def classification_data(n_classes=3, weights=None):
+    return make_classification(n_samples=400, n_features=8, n_informative=5, n_classes=n_classes,
+                               weights=weights, random_state=0)
+
+
+def regression_data():
+    return make_regression(n_samples=400, n_features=8, noise=5.0, random_state=0)
+
+
+def with_nans(X, share=0.1, seed=0):
+    X = X.copy()
+    X[np.random.default_rng(seed).random(X.shape) < share] = np.nan
+    return X
+
+
+CASES = {
+    "random_forest_classifier": (RandomForestClassifier(n_estimators=20, random_state=0), classification_data),
+    "random_forest_regressor": (RandomForestRegressor(n_estimators=20, random_state=0), regression_data),
+    "extra_trees_classifier": (ExtraTreesClassifier(n_estimators=20, random_state=0), classification_data),
+    "extra_trees_regressor": (ExtraTreesRegressor(n_estimators=20, random_state=0), regression_data),
+    "gradient_boosting_multiclass": (GradientBoostingClassifier(n_estimators=30, random_state=0), classification_data),
+    "gradient_boosting_binary": (GradientBoostingClassifier(n_estimators=30, random_state=0),
+                                 lambda: classification_data(n_classes=2)),
+    "gradient_boosting_regressor": (GradientBoostingRegressor(n_estimators=30, random_state=0), regression_data),
+    "hist_gradient_boosting_classifier": (HistGradientBoostingClassifier(max_iter=30, random_state=0),
+                                          classification_data),
+    "hist_gradient_boosting_regressor": (HistGradientBoostingRegressor(max_iter=30, random_state=0), regression_data),
+    "smote_pipeline": (
+        Pipeline([("smote", SMOTE(random_state=0)),
+                  ("clf", RandomForestClassifier(n_estimators=20, random_state=0))]),
+        lambda: classification_data(weights=[0.7, 0.2, 0.1]),
+    ),
+}
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_compiled_predictions_match_sklearn(name):
+    model, data = CASES[name]
+    X, y = data()
+    model.fit(X, y)
+
+    compiled = compile_model(model)
+    assert check_parity(model, compiled, X)["mismatches"] == 0
+    assert check_parity(model, compiled, _sample_rows(model, 2000))["mismatches"] == 0
+
+
+@pytest.mark.parametrize("model", [
+    RandomForestClassifier(n_estimators=20, random_state=0),
+    HistGradientBoostingClassifier(max_iter=30, random_state=0),
+])
+def test_nan_inputs_follow_missing_value_routing(model):
+    X, y = classification_data()
+    X = with_nans(X)
+    model.fit(X, y)
+
+    compiled = compile_model(model)
+    assert check_parity(model, compiled, X)["mismatches"] == 0
+    assert check_parity(model, compiled, with_nans(X, share=0.3, seed=1))["mismatches"] == 0